@@ -0,0 +1,392 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import os
+import re
+import gzip
+import json
+import struct
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Errors raised by the decompression of a corrupted file
+_DECOMPRESSION_ERRORS = (zstandard.ZstdError,) if zstandard is not None \
+    else ()
+
+
+_GZIP_MAGIC = b"\x1f\x8b"
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# ID codes of the datablocks listed, by bpy.data collection name
+ID_CODES = {b'GR': 'collections',
+            b'OB': 'objects',
+            b'MA': 'materials',
+            b'NT': 'node_groups',
+            b'WO': 'worlds'
+            }
+
+# Number of bytes kept from the start of the ID blocks, the name of the ID
+# is found once the SDNA has been read
+_ID_PEEK = 1024
+
+
+class AmBlendError(Exception):
+    pass
+
+
+class _AmBlendHeader:
+    """
+    Header of a .blend file. Two layouts exist:
+    'BLENDER_v300' with the pointer size, the endianness and the version,
+    and since Blender 5.0 'BLENDER17-01v0500' with the header size and the
+    file format version, the pointers are then always 8 bytes long.
+    """
+
+    def __init__(self, data):
+        if data[:7] != b"BLENDER":
+            raise AmBlendError("Not a blend file")
+
+        if data[7:9].isdigit():
+            self.size = int(data[7:9])
+            file_format = int(data[10:12])
+            if file_format != 1:
+                raise AmBlendError(f"Unsupported file format {file_format}")
+            self.pointer_size = 8
+            endian = data[12:13]
+            self.version = int(data[13:self.size])
+        else:
+            self.size = 12
+            file_format = 0
+            self.pointer_size = 8 if data[7:8] == b"-" else 4
+            endian = data[8:9]
+            self.version = int(data[9:12])
+
+        if endian not in (b"v", b"V"):
+            raise AmBlendError("Unknown endianness")
+        self.endian = "<" if endian == b"v" else ">"
+
+        if file_format == 1:
+            # code, SDNAnr, old, len, nr
+            self.bhead = struct.Struct(f"{self.endian}4siQqq")
+        elif self.pointer_size == 8:
+            # code, len, old, SDNAnr, nr
+            self.bhead = struct.Struct(f"{self.endian}4siQii")
+        else:
+            self.bhead = struct.Struct(f"{self.endian}4siIii")
+        self.large_bhead = file_format == 1
+
+    def unpack_bhead(self, data):
+        """
+        @return: Tuple, (code, length)
+        """
+        if self.large_bhead:
+            code, sdna, old, length, nr = self.bhead.unpack(data)
+        else:
+            code, length, old, sdna, nr = self.bhead.unpack(data)
+        return code, length
+
+
+def _align(offset):
+    return (offset + 3) & ~3
+
+
+def _get_id_name_field(data, endian, pointer_size):
+    """
+    Parse the SDNA to find the offset and the length of ID.name
+    @param data: Bytes, content of the DNA1 block
+    @return: Tuple, (offset, length)
+    """
+    if data[:8] != b"SDNANAME":
+        raise AmBlendError("Invalid SDNA")
+
+    def read_strings(offset):
+        count, = struct.unpack_from(f"{endian}i", data, offset)
+        offset += 4
+        strings = []
+        for i in range(count):
+            end = data.index(b"\0", offset)
+            strings.append(data[offset:end].decode('ascii', 'replace'))
+            offset = end + 1
+        return strings, _align(offset)
+
+    names, offset = read_strings(8)
+    if data[offset:offset + 4] != b"TYPE":
+        raise AmBlendError("Invalid SDNA")
+    types, offset = read_strings(offset + 4)
+
+    if data[offset:offset + 4] != b"TLEN":
+        raise AmBlendError("Invalid SDNA")
+    offset += 4
+    lengths = struct.unpack_from(f"{endian}{len(types)}h", data, offset)
+    offset = _align(offset + 2 * len(types))
+
+    if data[offset:offset + 4] != b"STRC":
+        raise AmBlendError("Invalid SDNA")
+    count, = struct.unpack_from(f"{endian}i", data, offset + 4)
+    offset += 8
+
+    for i in range(count):
+        type_index, nr_fields = struct.unpack_from(f"{endian}hh", data,
+                                                   offset)
+        offset += 4
+        fields = struct.unpack_from(f"{endian}{2 * nr_fields}h", data,
+                                    offset)
+        offset += 4 * nr_fields
+        if types[type_index] != "ID":
+            continue
+
+        field_offset = 0
+        for field_type, field_name in zip(fields[::2], fields[1::2]):
+            name = names[field_name]
+            array_size = 1
+            for dim in re.findall(r"\[(\d+)\]", name):
+                array_size *= int(dim)
+
+            if name.startswith(("*", "(*")):
+                size = pointer_size * array_size
+            else:
+                size = lengths[field_type] * array_size
+
+            if name.split("[")[0] == "name":
+                return field_offset, size
+            field_offset += size
+
+    raise AmBlendError("ID.name not found in the SDNA")
+
+
+class _AmBlendStream:
+
+    def __init__(self, filepath):
+        self._file = open(filepath, 'rb')
+        magic = self._file.read(4)
+        self._file.seek(0)
+
+        if magic.startswith(_GZIP_MAGIC):
+            self._stream = gzip.GzipFile(fileobj=self._file)
+        elif magic == _ZSTD_MAGIC:
+            if zstandard is None:
+                self._file.close()
+                raise AmBlendError("zstandard module not available to read "
+                                   "the compressed file")
+            # Blender writes the compressed files as independent frames
+            self._stream = zstandard.ZstdDecompressor().stream_reader(
+                    self._file, read_across_frames=True)
+        else:
+            self._stream = self._file
+
+    def read(self, size):
+        chunks = []
+        while size > 0:
+            chunk = self._stream.read(size)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
+
+    def skip(self, size):
+        if self._stream is self._file:
+            self._file.seek(size, os.SEEK_CUR)
+            return
+        while size > 0:
+            chunk = self._stream.read(min(size, 1 << 20))
+            if not chunk:
+                break
+            size -= len(chunk)
+
+    def close(self):
+        if self._stream is not self._file:
+            self._stream.close()
+        self._file.close()
+
+
+def read_datablocks(filepath):
+    """
+    List the datablocks saved in a .blend file without bpy. Only the block
+    headers, the start of the ID blocks and the SDNA are read.
+    @param filepath: String, path of the .blend file
+    @return: Dict, {'collections': [names], 'objects': [names], ...}
+    """
+    try:
+        return _read_datablocks(filepath)
+    except (struct.error, ValueError, IndexError, EOFError) + \
+            _DECOMPRESSION_ERRORS as e:
+        raise AmBlendError(f"Invalid blend file: {e}")
+
+
+def _read_datablocks(filepath):
+    stream = _AmBlendStream(filepath)
+    try:
+        data = stream.read(12)
+        if data[7:9].isdigit():
+            data += stream.read(int(data[7:9]) - 12)
+        header = _AmBlendHeader(data)
+
+        id_blocks = []
+        dna = None
+        while True:
+            data = stream.read(header.bhead.size)
+            if len(data) < header.bhead.size:
+                raise AmBlendError("Truncated file")
+            code, length = header.unpack_bhead(data)
+
+            if code == b"ENDB":
+                break
+
+            if code == b"DNA1":
+                dna = stream.read(length)
+                continue
+
+            id_code = code[:2] if code[2:] == b"\0\0" else None
+            if id_code in ID_CODES:
+                peek = min(length, _ID_PEEK)
+                id_blocks.append((id_code, stream.read(peek)))
+                stream.skip(length - peek)
+            else:
+                stream.skip(length)
+    finally:
+        stream.close()
+
+    if dna is None:
+        raise AmBlendError("SDNA not found")
+
+    offset, size = _get_id_name_field(dna, header.endian,
+                                      header.pointer_size)
+
+    datablocks = {data_type: [] for data_type in ID_CODES.values()}
+    for id_code, data in id_blocks:
+        # the name is prefixed with the 2 characters of the ID code
+        name = data[offset + 2:offset + size].split(b"\0", 1)[0]
+        datablocks[ID_CODES[id_code]].append(name.decode('utf-8', 'replace'))
+
+    return datablocks
+
+
+class AmBlendReader:
+    """
+    Thread-safe cache of the datablocks of the .blend files, a file is read
+    again when its size or its modification time change. The cache can be
+    saved so the files are not read again in the next sessions.
+    """
+
+    VERSION = 1
+
+    def __init__(self):
+        self._cache = {}
+        self._lock = threading.Lock()
+        self._filepath = None
+        self._loaded = False
+        self._modified = False
+
+    def set_filepath(self, filepath):
+        """
+        Set the file where the cache is saved, it is read the first time a
+        .blend file is requested
+        @param filepath: String
+        """
+        with self._lock:
+            if filepath != self._filepath:
+                self._filepath = filepath
+                self._loaded = False
+
+    def _load(self):
+        self._loaded = True
+        if self._filepath is None:
+            return
+        try:
+            with open(self._filepath, 'r', encoding="utf-8") as jsonf:
+                content = json.load(jsonf)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"{self._filepath}: The datablocks cache can't be read"
+                  f"\n\t{e}")
+            return
+
+        if content.get('version') != self.VERSION:
+            return
+        for filepath, (size, mtime, datablocks) in content.get(
+                'entries', {}).items():
+            self._cache.setdefault(filepath, ((size, mtime), datablocks))
+
+    def save(self, roots=None):
+        """
+        Save the cache if it has been modified
+        @param roots: Iterable, only keep the files of these libraries, all
+        the files are kept if None
+        """
+        with self._lock:
+            if not self._loaded or self._filepath is None:
+                return
+            if roots is not None:
+                prefixes = tuple(f"{root}{os.sep}" for root in roots)
+                for filepath in [filepath for filepath in self._cache if
+                                 not filepath.startswith(prefixes)]:
+                    del self._cache[filepath]
+                    self._modified = True
+            if not self._modified:
+                return
+            entries = {filepath: [key[0], key[1], datablocks] for
+                       filepath, (key, datablocks) in self._cache.items()}
+            self._modified = False
+
+            tmp_filepath = f"{self._filepath}.{os.getpid()}.tmp"
+            try:
+                with open(tmp_filepath, 'w', encoding="utf-8") as jsonf:
+                    json.dump({'version': self.VERSION, 'entries': entries},
+                              jsonf, indent=None)
+                os.replace(tmp_filepath, self._filepath)
+            except OSError as e:
+                print(f"{self._filepath}: The datablocks cache can't be "
+                      f"saved\n\t{e}")
+
+    def datablocks(self, filepath):
+        """
+        @param filepath: String, path of the .blend file
+        @return: Dict, {'collections': [names], 'objects': [names], ...}
+        """
+        stat = os.stat(filepath)
+        key = (stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            cached = self._cache.get(filepath)
+        if cached is not None and cached[0] == key:
+            return cached[1]
+
+        datablocks = read_datablocks(filepath)
+        with self._lock:
+            self._cache[filepath] = (key, datablocks)
+            self._modified = True
+        return datablocks
+
+    def discard(self, filepath):
+        with self._lock:
+            if self._cache.pop(filepath, None) is not None:
+                self._modified = True
+
+
+BlendReader = AmBlendReader()
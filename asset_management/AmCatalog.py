@@ -0,0 +1,236 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import os
+import json
+import time
+import uuid
+
+from contextlib import contextmanager
+
+from .ressources.constants import CATALOG_FILENAME
+
+
+class AmCatalog:
+    """
+    Stats of the assets of a category (file size, objects, vertices, faces,
+    materials, images, textures size, bounding box) stored in a json file
+    at the root of the category. The stats are written when the asset is
+    saved, by the post processing scripts, so they are known without
+    opening the asset files.
+    An asset may also have a list of 'tags', they are kept when its stats
+    are updated and are searched with the names of the assets.
+    The catalog is written by the blender sessions of several artists. It
+    is read, modified and saved under a lock file so two sessions don't
+    lose each other's changes, and replaced atomically so a reader never
+    gets a partially written file.
+    """
+
+    VERSION = 1
+
+    # Age in seconds of a lock file left by a session which has crashed,
+    # also the longest time waited for the lock
+    LOCK_TIMEOUT = 10
+
+    @staticmethod
+    def get_location(asset_path):
+        """
+        Return the category and the identifier of an asset
+        @param asset_path: String, path of the asset file
+        @return: Tuple, (category path, asset id)
+        """
+        dir_path, filename = os.path.split(asset_path)
+        if os.path.basename(dir_path) == "files":
+            return os.path.dirname(dir_path), os.path.join("files", filename)
+        return dir_path, filename
+
+    @staticmethod
+    def load(category_path):
+        """
+        @param category_path: String
+        @return: Dict, {asset id: stats}
+        """
+        filepath = os.path.join(category_path, CATALOG_FILENAME)
+        try:
+            with open(filepath, 'r', encoding="utf-8") as jsonf:
+                content = json.load(jsonf)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"{filepath}: The catalog can't be read\n\t{e}")
+            return {}
+
+        if content.get('version') != AmCatalog.VERSION:
+            return {}
+        return content.get('assets', {})
+
+    @staticmethod
+    @contextmanager
+    def _locked(category_path):
+        """
+        Hold the lock file of the catalog, created exclusively so only one
+        session gets it, also on the network shares
+        """
+        lock_filepath = os.path.join(category_path, f"{CATALOG_FILENAME}.lock")
+        deadline = time.monotonic() + AmCatalog.LOCK_TIMEOUT
+        while True:
+            try:
+                fd = os.open(lock_filepath,
+                             os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+                break
+            except FileExistsError:
+                pass
+
+            try:
+                lock = os.stat(lock_filepath)
+            except FileNotFoundError:
+                # released in the meantime
+                continue
+            if time.time() - lock.st_mtime > AmCatalog.LOCK_TIMEOUT:
+                AmCatalog._break_lock(lock_filepath, lock)
+                continue
+            if time.monotonic() > deadline:
+                raise TimeoutError("The catalog is locked by another session")
+            time.sleep(0.05)
+
+        owned = os.fstat(fd)
+        os.close(fd)
+        try:
+            yield
+        finally:
+            # the lock may have been broken if the session has been
+            # suspended longer than LOCK_TIMEOUT
+            try:
+                if AmCatalog._same_file(os.stat(lock_filepath), owned):
+                    os.remove(lock_filepath)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _same_file(stat, other):
+        return (stat.st_ino, stat.st_mtime_ns) == \
+               (other.st_ino, other.st_mtime_ns)
+
+    @staticmethod
+    def _break_lock(lock_filepath, stale):
+        """
+        Remove the lock file left by a session which has crashed. Several
+        sessions may find it stale at the same time, it is first renamed to
+        a unique name so only one of them gets it. Another session may also
+        have broken it and taken the lock since its stat has been read, the
+        renamed file is then its lock and is put back.
+        @param lock_filepath: String
+        @param stale: os.stat_result, stat of the stale lock file
+        """
+        broken_filepath = f"{lock_filepath}.{uuid.uuid4().hex}.stale"
+        try:
+            os.rename(lock_filepath, broken_filepath)
+        except FileNotFoundError:
+            # broken or released by another session
+            return
+
+        try:
+            if not AmCatalog._same_file(os.stat(broken_filepath), stale):
+                # fails if a third session has already taken the lock
+                os.link(broken_filepath, lock_filepath)
+        except OSError:
+            pass
+        finally:
+            try:
+                os.remove(broken_filepath)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _save(category_path, assets):
+        filepath = os.path.join(category_path, CATALOG_FILENAME)
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+        with open(tmp_filepath, 'w', encoding="utf-8") as jsonf:
+            json.dump({'version': AmCatalog.VERSION, 'assets': assets}, jsonf,
+                      indent=None)
+        os.replace(tmp_filepath, filepath)
+
+    @classmethod
+    def _edit(cls, category_path, edit):
+        """
+        Read, modify and save the catalog while holding its lock
+        @param category_path: String
+        @param edit: Function, modify the {asset id: stats} dict in place and
+        return True if it has to be saved
+        """
+        try:
+            with cls._locked(category_path):
+                assets = cls.load(category_path)
+                if edit(assets):
+                    cls._save(category_path, assets)
+        except OSError as e:
+            print(f"{category_path}: The catalog can't be saved\n\t{e}")
+
+    @classmethod
+    def update(cls, asset_path, stats):
+        """
+        Save the stats of an asset
+        @param asset_path: String, path of the asset file
+        @param stats: Dict
+        """
+        category_path, asset_id = cls.get_location(asset_path)
+
+        def update(assets):
+            tags = assets.get(asset_id, {}).get('tags')
+            if tags is not None and 'tags' not in stats:
+                assets[asset_id] = dict(stats, tags=tags)
+            else:
+                assets[asset_id] = stats
+            return True
+
+        cls._edit(category_path, update)
+
+    @classmethod
+    def remove(cls, asset_path):
+        category_path, asset_id = cls.get_location(asset_path)
+        cls._edit(category_path,
+                  lambda assets: assets.pop(asset_id, None) is not None)
+
+    @classmethod
+    def move(cls, src_path, dst_path):
+        """
+        Move the stats of an asset which has been renamed or moved
+        @param src_path: String, previous path of the asset file
+        @param dst_path: String, new path of the asset file
+        """
+        category_path, asset_id = cls.get_location(src_path)
+        dst_category_path, dst_asset_id = cls.get_location(dst_path)
+        # stats moved to another category
+        moved = []
+
+        def move(assets):
+            stats = assets.pop(asset_id, None)
+            if stats is None:
+                return False
+            if dst_category_path == category_path:
+                assets[dst_asset_id] = stats
+            else:
+                moved.append(stats)
+            return True
+
+        cls._edit(category_path, move)
+        if moved:
+            cls.update(dst_path, moved[0])
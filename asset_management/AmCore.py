@@ -21,9 +21,13 @@
 
 import bpy
 import os
+import sys
 import shutil
 import re
+import queue
+import threading
 
+from bisect import bisect_left, bisect_right
 from mathutils import Vector
 
 from .AmUtils import (AmName,
@@ -31,6 +35,11 @@ from .AmUtils import (AmName,
                       AmBackgroundProcessor,
                       minimum_blender_version,
                       addon_prefs)
+from .AmIndex import LibraryIndex, PathIndex, StatCache
+from .AmBlend import BlendReader, AmBlendError
+from .AmCatalog import AmCatalog
+from .AmSearch import SearchIndex, SearchCache, ContentIndexer
+from .AmFacets import AmFacets, MetadataStore
 from .ressources.constants import (SUPPORTED_ICONS,
                                    NODE_ENVIRONMENT,
                                    SUPPORTED_FILES,
@@ -46,12 +55,25 @@ ZERO = Vector()
 
 class AmAsset:
 
-    def __init__(self, parent, filename, from_root):
+    # A library can hold hundreds of thousands of assets, the paths are
+    # built once and the folders, shared by all the assets of a category,
+    # are interned
+    __slots__ = ('_parent', '_filename', '_name', '_from_root',
+                 '_collections', '_stat', '_dir_path', '_icon_dir', '_path')
+
+    def __init__(self, parent, filename, from_root, stat=None):
         self._parent = parent
         self._filename = filename
         self._name = os.path.splitext(self._filename)[0]
         self._from_root = from_root
         self._collections = None
+        self._stat = stat
+        if from_root:
+            self._dir_path = self._icon_dir = parent.path
+        else:
+            self._dir_path = sys.intern(os.path.join(parent.path, "files"))
+            self._icon_dir = sys.intern(os.path.join(parent.path, "icons"))
+        self._path = os.path.join(self._dir_path, filename)
 
     @property
     def collections(self):
@@ -60,9 +82,15 @@ class AmAsset:
             print(f"Not supported for the asset type {aType}")
             return
         if self._collections is None:
-            with bpy.data.libraries.load(self.path) as (data_from,
+            try:
+                self._collections = list(
+                        BlendReader.datablocks(self.path)['collections'])
+            except AmBlendError as e:
+                print(f"{self.path}: {e}")
+                with bpy.data.libraries.load(self.path) as (data_from,
                                                             data_to):
-                self._collections = [coll for coll in data_from.collections]
+                    self._collections = [coll for coll in
+                                         data_from.collections]
 
         return self._collections
 
@@ -75,6 +103,7 @@ class AmAsset:
         ext = os.path.splitext(self._filename)[-1]
         self._filename = f"{new_name}{ext}"
         self._name = new_name
+        self._path = os.path.join(self._dir_path, self._filename)
 
     @property
     def filename(self):
@@ -100,27 +129,53 @@ class AmAsset:
                                                                self._filename)
     @property
     def path(self):
-        return os.path.join(self._parent.path, self.id)
+        return self._path
+
+    @property
+    def is_registered(self):
+        """
+        The asset is still in its category, the searches discard the
+        indexed assets which are not registered anymore
+        @return: Bool
+        """
+        return PathIndex.get(self._path) is self
+
+    @property
+    def stats(self):
+        """
+        Return the stats saved in the catalog of the category when the asset
+        has been saved, the file size is always known
+        @return: Dict, {'file_size', 'objects', 'vertices', 'faces',
+        'materials', 'images', 'textures_size', 'bbox_min', 'bbox_max'}
+        """
+        stats = dict(self._parent.assets.catalog.get(self.id, {}))
+        if 'file_size' not in stats:
+            stats['file_size'] = self.stat[0]
+        return stats
+
+    @property
+    def stat(self):
+        """
+        Return the size and the modification time of the asset file, read
+        when the category has been loaded
+        @return: Tuple, (size, mtime in nanoseconds)
+        """
+        if self._stat is None:
+            stat = os.stat(self.path)
+            self._stat = (stat.st_size, stat.st_mtime_ns)
+        return self._stat
 
     @property
     def dir_path(self):
-        return os.path.dirname(self.path)
+        return self._dir_path
 
     @property
     def icon_dir(self):
-        return self._parent.path if self._from_root else os.path.join(
-                self._parent.path, "icons")
+        return self._icon_dir
 
     @property
     def icon_name(self):
-        thumb = [ico for ico in os.listdir(self.icon_dir) if ico.endswith(
-                SUPPORTED_ICONS) and os.path.splitext(ico)[0] == self.name]
-
-        bip_thumb = f"{self.name}.bip"
-        if bip_thumb in thumb:
-            return bip_thumb
-
-        return thumb[0] if thumb else None
+        return self._parent.assets.get_icon_name(self)
 
     @property
     def icon_path(self):
@@ -135,23 +190,32 @@ class AmAsset:
         icon = pcoll.get(self.id)
         if icon is not None:
             return icon.icon_id
-        return self.load_icon()
+        return self._load_preview()
 
-    def load_icon(self):
+    def _load_preview(self):
         pcoll = self._parent.assets.pcoll
         icon = pcoll.load_safe(str(self.id), str(self.icon_path), 'IMAGE')
         return icon.icon_id
 
+    def load_icon(self):
+        """
+        Load the icon after it has been written on the disk
+        @return: Int, icon id
+        """
+        assets = self._parent.assets
+        assets.set_icon(self)
+        assets.delete_preview(self)
+        return self._load_preview()
+
     @property
     def TEX_path(self):
         """
         Return the path of the TEX_ folder if exists
         @return: String, path
         """
-        root, dirs, files = next(os.walk(self.dir_path))
-        TEX_folder = f"TEX_{self.name}"
-        if TEX_folder in dirs:
-            return os.path.join(self.dir_path, TEX_folder)
+        TEX_folder = os.path.join(self.dir_path, f"TEX_{self.name}")
+        if StatCache.isdir(TEX_folder):
+            return TEX_folder
         return None
 
     @property
@@ -160,11 +224,7 @@ class AmAsset:
         Returns the AssetType object class of the asset
         @return: AssetType Object
         """
-        category = self._parent
-        while category.__class__.__name__ != 'AssetType':
-            category = category.parent
-
-        return category
+        return self._parent.parent_asset_type
 
     @property
     def parent_library(self):
@@ -172,50 +232,326 @@ class AmAsset:
         Returns the Library object class of the asset
         @return: Library Object
         """
-        return self.parent_asset_type.parent
+        return self._parent.parent_asset_type.parent
+
+
+class AmAssetEntry:
+    """
+    Asset of a category whose assets are not loaded, indexed so that the
+    searches don't load all the categories. It is read from the census of
+    the category and its catalog, only the categories of the found assets
+    are then loaded and the entries replaced by their AmAsset.
+    """
+
+    __slots__ = ('_parent', '_filename', '_name', '_from_root', '_path',
+                 '_stat', '_catalog')
+
+    def __init__(self, parent, filename, from_root, stat, catalog):
+        """
+        @param parent: Category, not loaded
+        @param stat: Tuple, (size, mtime in nanoseconds) or None if unknown
+        @param catalog: Dict, {asset id: stats}, catalog of the category
+        """
+        self._parent = parent
+        self._filename = filename
+        self._name = os.path.splitext(filename)[0]
+        self._from_root = from_root
+        dir_path = parent.path if from_root else os.path.join(parent.path,
+                                                              "files")
+        self._path = os.path.join(dir_path, filename)
+        self._stat = stat
+        self._catalog = catalog
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def filename(self):
+        return self._filename
+
+    @property
+    def parent(self):
+        return self._parent
+
+    @property
+    def id(self):
+        if self._from_root:
+            return self._filename
+        return os.path.join("files", self._filename)
+
+    @property
+    def path(self):
+        return self._path
+
+    @property
+    def is_registered(self):
+        """
+        The entries are discarded when their category is loaded or removed
+        @return: Bool
+        """
+        return not self._parent.is_loaded and \
+            PathIndex.get(self._parent.path) is self._parent
+
+    @property
+    def stats(self):
+        stats = dict(self._catalog.get(self.id, {}))
+        if 'file_size' not in stats:
+            stats['file_size'] = self.stat[0]
+        return stats
+
+    @property
+    def stat(self):
+        if self._stat is None:
+            stat = os.stat(self._path)
+            self._stat = (stat.st_size, stat.st_mtime_ns)
+        return self._stat
+
+    @property
+    def parent_asset_type(self):
+        return self._parent.parent_asset_type
+
+    def load(self):
+        """
+        Load the category of the asset
+        @return: AmAsset, None if the file doesn't exist anymore
+        """
+        asset = PathIndex.get(self._path)
+        if asset is None:
+            self._parent.assets
+            asset = PathIndex.get(self._path)
+        return asset if isinstance(asset, AmAsset) else None
+
+
+class AmPages:
+    """
+    Split the assets of a category in pages of the size set in the
+    preferences. Only the page of the active asset is passed to the previews
+    enum, so the previews of the other pages are never loaded.
+    """
+
+    @staticmethod
+    def get_bounds(index, count):
+        """
+        Return the page which contains the asset
+        @param index: Int, index of the asset in the sorted assets
+        @param count: Int, number of assets
+        @return: Tuple, (first index, last index + 1)
+        """
+        size = addon_prefs().interface.page_size
+        if not size or count <= size:
+            return 0, count
+        start = index // size * size
+        return start, min(start + size, count)
+
+    @staticmethod
+    def get_page(index, count):
+        """
+        @return: Tuple, (page number starting at 1, number of pages)
+        """
+        size = addon_prefs().interface.page_size
+        if not size or count <= size:
+            return 1, 1
+        return index // size + 1, (count - 1) // size + 1
+
+    @staticmethod
+    def fill_enum_items(items, assets, page, matches=None):
+        """
+        Build the items of the previews enum, the values are the indexes in
+        all the sorted assets
+        @param matches: Dict, {asset: datablock found by the search}, added
+        to the description of the items
+        """
+        items.clear()
+        start, end = page
+        if not assets:
+            items.append(('NONE', "None", ""))
+        elif not matches:
+            items.extend([(asset.path, asset.name, asset.path, asset.icon_id,
+                           idx) for idx, asset in
+                          enumerate(assets[start:end], start)])
+        else:
+            for idx, asset in enumerate(assets[start:end], start):
+                match = matches.get(asset)
+                description = asset.path if match is None else \
+                    f"{asset.path}\nFound: {match}"
+                items.append((asset.path, asset.name, description,
+                              asset.icon_id, idx))
+
+    @staticmethod
+    def display(owner, assets):
+        """
+        Hold the previews of the assets of the page displayed by the owner
+        and release the previews of the assets it no longer displays
+        @param owner: AmPreviewsOwner
+        @param assets: List, assets of the displayed page
+        """
+        displayed = set(assets)
+        for asset in owner.displayed:
+            if asset not in displayed:
+                asset.parent.assets.release_preview(asset, owner)
+        for asset in assets:
+            asset.parent.assets.hold_preview(asset, owner)
+        owner.displayed = list(assets)
+
+
+class AmPreviewsOwner:
+    """
+    View displaying the previews of a page of assets, a category or the
+    results of a search. The previews are loaded in the preview collection
+    of the category of each asset and are shared by the views, a preview is
+    only removed once no view displays it.
+    """
+
+    __slots__ = ('generation', 'displayed')
+
+    def __init__(self):
+        # incremented each time a preview displayed by the view is
+        # removed, the icon ids of its enum items are then outdated
+        self.generation = 0
+        self.displayed = []
+
+
+class AmSortedAssets:
+    """
+    Assets kept sorted by name as they are inserted. The position of each
+    asset is cached until the next insertion or removal.
+    """
+
+    def __init__(self):
+        self._keys = []
+        self._assets = []
+        self._positions = None
+        # incremented each time the assets are modified
+        self.generation = 0
+
+    @staticmethod
+    def _key(asset):
+        return asset.name.lower(), asset.id
+
+    def add(self, asset):
+        key = self._key(asset)
+        idx = bisect_right(self._keys, key)
+        self._keys.insert(idx, key)
+        self._assets.insert(idx, asset)
+        self._positions = None
+        self.generation += 1
+
+    def discard(self, asset):
+        key = self._key(asset)
+        idx = bisect_left(self._keys, key)
+        while idx < len(self._keys) and self._keys[idx] == key:
+            if self._assets[idx] is asset:
+                del self._keys[idx]
+                del self._assets[idx]
+                self._positions = None
+                self.generation += 1
+                return
+            idx += 1
+
+    def clear(self):
+        self._keys.clear()
+        self._assets.clear()
+        self._positions = None
+        self.generation += 1
+
+    def extend(self, items):
+        """
+        Append assets sorted after the current ones, they may be sorted in
+        another order than by name, the assets must then not be added or
+        discarded one by one
+        @param items: List, [(sort key, asset)]
+        """
+        self._keys.extend(key for key, asset in items)
+        self._assets.extend(asset for key, asset in items)
+        self._positions = None
+        self.generation += 1
+
+    def index(self, asset):
+        if self._positions is None:
+            self._positions = {asset: idx for idx, asset in
+                               enumerate(self._assets)}
+        idx = self._positions.get(asset)
+        if idx is None:
+            raise ValueError(f"{asset.name} is not in the assets")
+        return idx
+
+    @property
+    def assets(self):
+        """
+        Return the assets sorted by name, the list must not be modified
+        @return: List
+        """
+        return self._assets
+
+    def __len__(self):
+        return len(self._assets)
 
 
 class AmAssets(list):
 
     def __init__(self, parent):
         list.__init__(self)
-        _icon_size = addon_prefs().addon_pref.icon_size
+        self._sorted = AmSortedAssets()
 
         self._parent = parent
         self._active = None
         self._active_index = 0
         self._enum_items = []
-        self._pcoll = previews.new(max_size=(int(_icon_size),
-                                             int(_icon_size)))
+        self._enum_generation = None
+        # created the first time a preview is loaded
+        self._pcoll = None
+        self._previews_owner = AmPreviewsOwner()
+        # {asset: set of the AmPreviewsOwner displaying its preview}
+        self._holders = {}
+        # the datablocks are indexed once the category has been opened or
+        # found by a search
+        self._contents_queued = False
         self._asset_to_move = None
+        self._mtimes = None
+        # {icon folder: {asset name: icon filename}}
+        self._icons = {}
+        self._catalog = None
+        # the catalog tags are indexed when the catalog is read
+        SearchIndex.mark_incomplete(parent.parent_asset_type.name)
 
         self._load_files()
 
-    def _load_files(self, from_root=True):
-        path = self._parent.path if from_root else os.path.join(
-                self._parent.path, "files")
-        root, dirs, files = next(os.walk(path))
-        for file in files:
-            self.add(file, from_root)
-
-        if "files" in dirs and "icons" in dirs:
-            self._load_files(from_root=False)
+    def _load_files(self):
+        path = self._parent.path
+        census = LibraryIndex.census(path)
+        self._mtimes = [LibraryIndex.get_mtime(path),
+                        LibraryIndex.get_mtime(os.path.join(path, "files"))]
+        self._load_icons(census)
+        for filename, from_root in census.assets:
+            self._append(filename, from_root, census.stats)
 
         if self:
             self._active = self.sorted[self._active_index]
 
     @property
     def enum_items(self):
-        self._enum_items.clear()
+        """
+        Return the items of the previews enum. The items are only built
+        again when the assets or the previews have been modified since the
+        last call.
+        @return: List, [(path, name, path, icon id, index)]
+        """
         assets = self.sorted
-
-        if not assets:
-            return [('NONE', "None", "")]
-
-        self._enum_items.extend(
-                [(asset.path, asset.name, asset.path, asset.icon_id,
-                  idx) for idx, asset in enumerate(assets)])
-
+        page = AmPages.get_bounds(self.active_index, len(assets))
+        owner = self._previews_owner
+        generation = (self._sorted.generation, owner.generation, page)
+        if generation == self._enum_generation:
+            return self._enum_items
+
+        self.queue_contents()
+        AmPages.display(owner, assets[page[0]:page[1]])
+        AmPages.fill_enum_items(self._enum_items, assets, page)
+
+        # read after the icon ids, loading a preview doesn't modify the
+        # generation
+        self._enum_generation = (self._sorted.generation, owner.generation,
+                                 page)
         return self._enum_items
 
     @property
@@ -224,8 +560,8 @@ class AmAssets(list):
 
     @active.setter
     def active(self, asset):
-        if asset is not None and os.path.exists(asset.path):
-            idx = self.sorted.index(asset)
+        if asset is not None and StatCache.exists(asset.path):
+            idx = self._sorted.index(asset)
             self._active = asset
             self._active_index = idx
         else:
@@ -234,8 +570,32 @@ class AmAssets(list):
 
     @property
     def active_index(self):
+        if self._active is not None:
+            # the assets inserted or removed before the active asset move it
+            try:
+                self._active_index = self._sorted.index(self._active)
+            except ValueError:
+                pass
         return self._active_index
 
+    def append(self, asset):
+        list.append(self, asset)
+        self._sorted.add(asset)
+        SearchIndex.add(asset)
+        if self._contents_queued:
+            ContentIndexer.queue((asset,))
+
+    def remove(self, asset):
+        list.remove(self, asset)
+        self._sorted.discard(asset)
+        SearchIndex.discard(asset)
+
+    def clear(self):
+        for asset in self:
+            SearchIndex.discard(asset)
+        list.clear(self)
+        self._sorted.clear()
+
     @property
     def pcoll(self):
         if self._pcoll is None:
@@ -244,12 +604,221 @@ class AmAssets(list):
                                                  int(icon_size)))
         return self._pcoll
 
-    def update(self):
-        self.clear()
+    @property
+    def catalog(self):
+        """
+        Return the stats of the assets, the catalog is read the first time
+        it is needed
+        @return: Dict, {asset id: stats}
+        """
+        if self._catalog is None:
+            self._catalog = AmCatalog.load(self._parent.path)
+            for asset in self:
+                SearchIndex.set_tags(asset, self._catalog.get(
+                        asset.id, {}).get('tags', ()))
+        return self._catalog
+
+    def reload_catalog(self):
+        """
+        Read the catalog again and the datablocks of the modified files,
+        called when the files of the category have been modified
+        """
+        self._catalog = None
+        SearchIndex.mark_incomplete(self._parent.parent_asset_type.name)
+        MetadataStore.invalidate(self._parent.parent_asset_type.name)
+        if self._contents_queued:
+            ContentIndexer.queue(self)
+
+    def queue_contents(self):
+        """
+        Read the datablocks of the asset files in the background, called
+        when the category is displayed or one of its assets is found by a
+        search. The added and modified files are then read as they are
+        found, the files of the other categories are never opened.
+        """
+        if not self._contents_queued and ContentIndexer.enabled:
+            self._contents_queued = True
+            ContentIndexer.queue(self)
+
+    def hold_preview(self, asset, owner):
+        """
+        The preview of the asset is displayed by the view
+        @param asset: Asset instance
+        @param owner: AmPreviewsOwner
+        """
+        self._holders.setdefault(asset, set()).add(owner)
+
+    def release_preview(self, asset, owner):
+        """
+        The preview of the asset is no longer displayed by the view, it is
+        removed if no other view displays it
+        @param asset: Asset instance
+        @param owner: AmPreviewsOwner
+        """
+        owners = self._holders.get(asset)
+        if owners is None:
+            # held before the previews have been removed
+            return
+        owners.discard(owner)
+        if not owners:
+            del self._holders[asset]
+            if self._pcoll is not None:
+                self._pcoll.delete_item(asset.id)
+
+    def delete_preview(self, asset):
+        """
+        Remove the preview of the asset, it is loaded again the next time
+        the asset is displayed
+        @param asset: Asset instance
+        """
+        if self._pcoll is not None:
+            self._pcoll.delete_item(asset.id)
+        for owner in self._holders.get(asset, ()):
+            owner.generation += 1
+
+    def remove_previews(self):
+        """
+        Remove the preview collection of the category
+        """
         if self._pcoll is not None:
             previews.remove(self._pcoll)
+            self._pcoll = None
+        for owner in set().union(*self._holders.values()):
+            owner.generation += 1
+        self._holders.clear()
+
+    def update(self):
+        assets = list(self)
+        self.clear()
+        for asset in assets:
+            PathIndex.unregister(asset.path, asset)
+        self.remove_previews()
         self._load_files()
 
+    def _load_icons(self, census):
+        self._icons.clear()
+        for path, filenames in census.icons.items():
+            icons = self._icons[path] = {}
+            for filename in filenames:
+                name, ext = os.path.splitext(filename)
+                # the .bip icons are preferred, they are faster to load
+                if name not in icons or ext.lower() == '.bip':
+                    icons[name] = filename
+
+    def get_icon_name(self, asset):
+        """
+        Return the filename of the icon of the asset
+        @param asset: Asset instance
+        @return: String or None if the asset has no icon
+        """
+        icons = self._icons.get(asset.icon_dir)
+        return icons.get(asset.name) if icons is not None else None
+
+    def set_icon(self, asset, icon_name=None):
+        """
+        Register the icon of the asset
+        @param asset: Asset instance
+        @param icon_name: String, filename of the icon, if None the icon is
+        searched on the disk
+        """
+        icons = self._icons.setdefault(asset.icon_dir, {})
+        if icon_name is None:
+            for ext in ('.bip',) + tuple(ext for ext in SUPPORTED_ICONS if
+                                         ext != '.bip'):
+                if os.path.isfile(os.path.join(asset.icon_dir,
+                                               f"{asset.name}{ext}")):
+                    icon_name = f"{asset.name}{ext}"
+                    break
+
+        if icon_name is None:
+            icons.pop(asset.name, None)
+        else:
+            icons[asset.name] = icon_name
+
+    def discard_icon(self, asset):
+        icons = self._icons.get(asset.icon_dir)
+        if icons is not None:
+            icons.pop(asset.name, None)
+
+    def refresh(self, force=False):
+        """
+        Synchronise the assets with the category folders without reloading
+        them. Only the added and removed files are processed, the loaded
+        previews and the active asset are kept.
+        @param force: Bool, list the folders even if their modification time
+        has not changed
+        @return: Bool, True if the category folders have been modified
+        """
+        mtimes = [AmPath.get_mtime(self._parent.path),
+                  AmPath.get_mtime(os.path.join(self._parent.path, "files"))]
+        if not force and mtimes == self._mtimes:
+            return False
+        self._mtimes = mtimes
+        self.reload_catalog()
+
+        path = self._parent.path
+        LibraryIndex.expire(path, os.path.join(path, "files"),
+                            os.path.join(path, "icons"))
+        census = LibraryIndex.census(path)
+        self._load_icons(census)
+        files = {filename if from_root else os.path.join("files", filename):
+                 (filename, from_root) for filename, from_root in
+                 census.assets}
+        existing = {asset.id: asset for asset in self}
+
+        for id_, asset in existing.items():
+            if id_ not in files:
+                self.discard(asset)
+
+        for id_, (filename, from_root) in files.items():
+            if id_ not in existing:
+                self._append(filename, from_root, census.stats)
+
+        active = self._active
+        if active is not None and active in self:
+            self.active = active
+        else:
+            assets = self.sorted
+            self.active = assets[min(self._active_index, len(assets) - 1)] \
+                if assets else None
+
+        return True
+
+    def reload_icons(self, names):
+        """
+        Remove the previews of the assets so that their icons are loaded
+        again the next time they are displayed
+        @param names: Iterable, names of the assets
+        """
+        if self._pcoll is None:
+            return
+        names = set(names)
+        for asset in self:
+            if asset.name in names:
+                self.delete_preview(asset)
+
+    def discard(self, asset):
+        """
+        Remove an asset which no longer exists on the disk from the category
+        @param asset: Asset instance
+        """
+        self.remove(asset)
+        PathIndex.unregister(asset.path, asset)
+        self.discard_icon(asset)
+        self.delete_preview(asset)
+
+    def _append(self, filename, from_root, stats):
+        """
+        Append an asset read from the disk, nothing is written
+        """
+        id_ = filename if from_root else os.path.join("files", filename)
+        asset = AmAsset(self._parent, filename, from_root, stats.get(id_))
+        # registered before being indexed, the searches discard the indexed
+        # assets which are not registered
+        PathIndex.register(asset.path, asset)
+        self.append(asset)
+        return asset
+
     def add(self, filename, from_root):
         """
         Function to add a new asset in the library
@@ -262,6 +831,7 @@ class AmAssets(list):
         if os.path.splitext(filename)[-1].lower() in SUPPORTED_FILES:
             AmPath.get_export_dirs(self._parent.path, from_root)
             file = AmAsset(self._parent, filename, from_root)
+            PathIndex.register(file.path, file)
             self.append(file)
             return file
         return None
@@ -275,21 +845,27 @@ class AmAssets(list):
         @return:
         """
 
+        StatCache.invalidate(asset.dir_path)
         TEX_folder = asset.TEX_path
         if TEX_folder is not None:
             AmPath.remove_tree(TEX_folder)
 
         AmPath.remove_file(asset.path, output=True)
         self.remove(asset)
+        PathIndex.unregister(asset.path, asset)
+        AmCatalog.remove(asset.path)
+        self.reload_catalog()
 
         default_icon = os.path.join(ICONS_PATH, "default.bip")
         if not keep_icon and asset.icon_path != default_icon:
             AmPath.remove_file(asset.icon_path, output=False)
-            self._pcoll.delete_item(asset.id)
+            self.discard_icon(asset)
+            self.delete_preview(asset)
 
     def rename(self, asset, new_name):
         old_name = asset.name
         ext = os.path.splitext(asset.filename)[-1]
+        StatCache.invalidate(asset.dir_path)
         TEX_folder = asset.TEX_path
 
         if TEX_folder is not None:
@@ -301,10 +877,23 @@ class AmAssets(list):
             icon_ext = os.path.splitext(icon_name)[-1]
             os.rename(asset.icon_path,
                       os.path.join(asset.icon_dir, f"{new_name}{icon_ext}"))
-
-        self._pcoll.delete_item(asset.id)
+            self.discard_icon(asset)
+            icon_name = f"{new_name}{icon_ext}"
+
+        self.delete_preview(asset)
+        self._sorted.discard(asset)
+        SearchIndex.discard(asset)
+        PathIndex.unregister(asset.path, asset)
+        old_path = asset.path
         asset.name = new_name
-        asset.load_icon()
+        PathIndex.register(asset.path, asset)
+        self._sorted.add(asset)
+        SearchIndex.add(asset)
+        AmCatalog.move(old_path, asset.path)
+        self.reload_catalog()
+        if icon_name is not None:
+            self.set_icon(asset, icon_name)
+        asset._load_preview()
 
         if asset.parent_asset_type.name == 'materials':
             post_processing = AmBackgroundProcessor()
@@ -338,7 +927,80 @@ class AmAssets(list):
 
     @property
     def sorted(self):
-        return sorted(self, key=lambda file: file.name.lower())
+        return self._sorted.assets
+
+
+class AmAssetStats:
+    """
+    Collect the stats of the asset opened in the current blender session,
+    used by the post processing scripts after saving the asset
+    """
+
+    @staticmethod
+    def _textures_size(images):
+        size = 0
+        for image in images:
+            if image.packed_file is not None:
+                size += image.packed_file.size
+            elif image.source in {'FILE', 'SEQUENCE', 'MOVIE', 'TILED'}:
+                path = bpy.path.abspath(image.filepath, library=image.library)
+                if os.path.isfile(path):
+                    size += os.path.getsize(path)
+        return size
+
+    @staticmethod
+    def collect(filepath=None):
+        """
+        @param filepath: String, path of the saved asset, the current
+        blendfile if None
+        @return: Dict
+        """
+        if filepath is None:
+            filepath = bpy.data.filepath
+
+        vertices = faces = 0
+        bbox_min = bbox_max = None
+        for ob in bpy.data.objects:
+            if ob.type == 'MESH':
+                vertices += len(ob.data.vertices)
+                faces += len(ob.data.polygons)
+
+            if ob.type not in {'MESH', 'CURVE', 'SURFACE', 'FONT', 'META'}:
+                continue
+
+            for corner in ob.bound_box:
+                co = ob.matrix_world @ Vector(corner)
+                if bbox_min is None:
+                    bbox_min = list(co)
+                    bbox_max = list(co)
+                    continue
+                for i in range(3):
+                    bbox_min[i] = min(bbox_min[i], co[i])
+                    bbox_max[i] = max(bbox_max[i], co[i])
+
+        stat = os.stat(filepath)
+
+        return {'file_size': stat.st_size,
+                'mtime': stat.st_mtime_ns,
+                'objects': len(bpy.data.objects),
+                'vertices': vertices,
+                'faces': faces,
+                'materials': len(bpy.data.materials),
+                'images': len(bpy.data.images),
+                'textures_size': AmAssetStats._textures_size(bpy.data.images),
+                'bbox_min': bbox_min,
+                'bbox_max': bbox_max
+                }
+
+    @staticmethod
+    def save(filepath=None):
+        """
+        Collect the stats of the asset and save them in the catalog of its
+        category
+        """
+        if filepath is None:
+            filepath = bpy.data.filepath
+        AmCatalog.update(filepath, AmAssetStats.collect(filepath))
 
 
 class AmImage:
@@ -1108,51 +1770,285 @@ class AmTags(list):
 
 
 class AmAssetFilter(AmTags):
+    """
+    Assets of an asset type matching the search of the user. The search
+    runs in a thread once the tags haven't been modified for the search
+    delay, the ranked assets are then added to the results by chunks from
+    a timer. A new search cancels the search in progress.
+    The results are filtered and sorted by the facets of the asset type,
+    the assets are only filtered by their metadata if there are no tags.
+    """
+
+    # Number of assets added to the results at each tick of the timer
+    CHUNK_SIZE = 500
+
     def __init__(self, id_):
         AmTags.__init__(self)
         self._id = id_
+        self.facets = AmFacets(types=(id_,))
         self._assets = set()
+        # {asset: description of the datablock found in its file}
+        self._matches = {}
+        self._sorted = AmSortedAssets()
         self._active = None
         self._active_index = 0
         self._enum_items = []
+        self._enum_generation = None
+        self._previews_owner = AmPreviewsOwner()
+        self._libraries = []
+        self._thread = None
+        self._results = None
+        self._cancelled = None
+        # the results of the previous search are kept until the first
+        # chunk of the new one is received
+        self._received = False
+        self._previous_active = None
+        # bpy.app.timers identifies the timers by the function object, the
+        # bound methods are created once
+        self._start_search = self._start_search
+        self._receive = self._receive
+
+    @property
+    def searching(self):
+        return bpy.app.timers.is_registered(self._start_search) or \
+            bpy.app.timers.is_registered(self._receive)
 
-    def _get_assets(self, category):
+    def _index_assets(self, category):
         for cat in category.categories.values():
-            for tag in self.tags:
-                for am_asset in cat.assets:
-                    if re.search(tag.lower(), am_asset.name.lower()):
-                        self._assets.add(am_asset)
+            if cat.is_loaded:
+                # the assets are indexed as they are loaded and their
+                # catalog tags when the catalog is read
+                cat.assets.catalog
+            else:
+                cat.index_entries()
+            self._index_assets(cat)
 
-            self._get_assets(cat)
+    def _prepare(self):
+        """
+        Index the assets which are not indexed yet, done from the main
+        thread before searching. The categories which are not loaded are
+        indexed without being loaded.
+        """
+        if SearchIndex.is_complete(self._id):
+            return
+        for library in self._libraries:
+            aType = library.asset_types.get(self._id)
+            if aType is not None:
+                self._index_assets(aType)
+        SearchIndex.mark_complete(self._id)
 
-    def update_assets(self, am_libraries):
-        if not self.tags:
+    @staticmethod
+    def _load_found(items):
+        """
+        Load the categories of the found entries, only the categories
+        having results are loaded
+        @param items: List, [(sort key, asset, match)]
+        @return: List, [(sort key, asset, match)], the entries replaced by
+        their AmAsset
+        """
+        loaded = []
+        for key, asset, match in items:
+            if isinstance(asset, AmAssetEntry):
+                asset = asset.load()
+                if asset is None:
+                    continue
+            loaded.append((key, asset, match))
+        return loaded
+
+    @staticmethod
+    def _rank(found):
+        """
+        @param found: Dict, {asset: (score, match)}
+        @return: List, [(sort key, asset, match)], the best matches first
+        """
+        return sorted((((-score, asset.name.lower(), asset.id), asset, match)
+                       for asset, (score, match) in found.items()),
+                      key=lambda item: item[0])
+
+    @classmethod
+    def _search_ranked(cls, type_id, tags):
+        """
+        Search and rank the assets, the results are kept in the SearchCache
+        @return: List, [(sort key, asset, match)]
+        """
+        generation = SearchIndex.get_generation(type_id)
+        ranked = cls._rank(SearchIndex.search(type_id, tags))
+        SearchCache.put(type_id, tags, generation, ranked)
+        return ranked
+
+    def update_assets(self, am_libraries, background=None):
+        """
+        Search the assets matching the tags
+        @param am_libraries: Iterable, libraries to search
+        @param background: Bool, search in a thread, if None the addon
+        preferences are used
+        """
+        self.cancel()
+        if not self.tags and not self.facets.is_active:
             self.clear_search()
             return
-        self._assets.clear()
-        self._active_index = 0
-        self._active = None
 
-        for library in am_libraries:
-            aType = library.asset_types.get(self._id)
-            if aType is None:
-                continue
-            self._get_assets(aType)
+        self._libraries = list(am_libraries)
+        self._previous_active = self._active
+        if not self.tags:
+            self._prepare()
+            assets = MetadataStore.select(self.facets)
+            self._set_results(self._load_found([(idx, asset, None) for
+                                                idx, asset in
+                                                enumerate(assets)]))
+            self._finish()
+            return self._assets
+
+        # a repeated search whose assets haven't been modified is not run
+        # again
+        ranked = SearchCache.get(self._id, self.tags) if \
+            SearchIndex.is_complete(self._id) else None
+
+        prefs = addon_prefs().interface
+        if background is None:
+            background = prefs.background_search and not bpy.app.background
+        if ranked is None and background:
+            bpy.app.timers.register(self._start_search,
+                                    first_interval=prefs.search_delay)
+            return
 
+        if ranked is None:
+            self._prepare()
+            ranked = self._search_ranked(self._id, self.tags)
+        self._set_results(self._load_found(self._filter(ranked)))
+        self._finish()
         return self._assets
 
+    def cancel(self):
+        """
+        Cancel the search in progress, the current results are kept
+        """
+        for timer in (self._start_search, self._receive):
+            if bpy.app.timers.is_registered(timer):
+                bpy.app.timers.unregister(timer)
+        if self._cancelled is not None:
+            self._cancelled.set()
+            self._cancelled = None
+        self._thread = None
+
+    def _start_search(self):
+        self._prepare()
+        self._results = queue.Queue()
+        self._cancelled = threading.Event()
+        self._received = False
+        self._thread = threading.Thread(target=self._search,
+                                        args=(self._id,
+                                              list(self.tags),
+                                              self._results,
+                                              self._cancelled),
+                                        daemon=True)
+        self._thread.start()
+        bpy.app.timers.register(self._receive, first_interval=0.01)
+        return None
+
+    @classmethod
+    def _search(cls, type_id, tags, results, cancelled):
+        """
+        Search and rank the assets, run by the thread. The ranked assets
+        are sent by chunks, None ends the results.
+        """
+        ranked = cls._search_ranked(type_id, tags)
+        for start in range(0, len(ranked), cls.CHUNK_SIZE):
+            if cancelled.is_set():
+                return
+            results.put(ranked[start:start + cls.CHUNK_SIZE])
+        results.put(None)
+
+    def _filter(self, items, sort=True):
+        """
+        Keep the ranked assets matching the facets
+        @param items: List, [(sort key, asset, match)]
+        @param sort: Bool, sort the assets with the sort key of the facets,
+        otherwise they stay sorted by score
+        @return: List, [(sort key, asset, match)]
+        """
+        if not self.facets.is_active:
+            return items
+        found = {asset: (key, match) for key, asset, match in items}
+        return [(found[asset][0], asset, found[asset][1]) for asset in
+                MetadataStore.select(self.facets, list(found), sort=sort)]
+
+    def _set_results(self, items, reset=True):
+        if reset:
+            self._assets = set()
+            self._matches = {}
+            self._sorted.clear()
+            self._active = None
+            self._active_index = 0
+        self._assets.update(asset for key, asset, match in items)
+        self._matches.update((asset, match) for key, asset, match in items
+                             if match is not None)
+        self._sorted.extend([(key, asset) for key, asset, match in items])
+        for category in {asset.parent for key, asset, match in items}:
+            category.assets.queue_contents()
+
+    def _finish(self):
+        """
+        Select again the active asset of the previous results if it has
+        been found again
+        """
+        self._thread = None
+        active = self._previous_active
+        self._previous_active = None
+        if active is not None and active in self._assets:
+            self.active = active
+
+    def _receive(self):
+        try:
+            items = self._results.get_nowait()
+        except queue.Empty:
+            if self._thread.is_alive():
+                return 0.02
+            # the thread has been interrupted by an error
+            items = None
+
+        if items is not None or not self._received:
+            # the chunks are sorted by the facets once they are all received
+            self._set_results(self._load_found(self._filter(items or [],
+                                                            sort=False)),
+                              reset=not self._received)
+            self._received = True
+
+        if items is None and self.facets.sort != 'SCORE':
+            assets = MetadataStore.select(self.facets, self._sorted.assets)
+            self._sorted.clear()
+            self._sorted.extend(list(enumerate(assets)))
+            self.active = self._active
+
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+
+        if items is None:
+            self._finish()
+            return None
+        return 0.0
+
     @property
     def assets(self):
         return self._assets
 
+    def get_match(self, asset):
+        """
+        @param asset: Asset instance
+        @return: String, datablock of the asset file matching the search,
+        "Object Bolt_M8", None if the asset is found by its name
+        """
+        return self._matches.get(asset)
+
     @property
     def active(self):
         return self._active
 
     @active.setter
     def active(self, asset):
-        if asset is not None and os.path.exists(asset.path):
-            idx = self.sorted.index(asset)
+        if asset is not None and StatCache.exists(asset.path):
+            idx = self._sorted.index(asset)
             self._active = asset
             self._active_index = idx
         else:
@@ -1165,25 +2061,35 @@ class AmAssetFilter(AmTags):
 
     @property
     def enum_items(self):
-        self._enum_items.clear()
         assets = self.sorted
-
-        if not assets:
-            return [('NONE', "None", "")]
-
-        self._enum_items.extend(
-                [(asset.path, asset.name, asset.path, asset.icon_id,
-                  idx) for idx, asset in enumerate(assets)])
-
+        page = AmPages.get_bounds(self._active_index, len(assets))
+        owner = self._previews_owner
+        generation = (self._sorted.generation, owner.generation, page)
+        if generation == self._enum_generation:
+            return self._enum_items
+
+        AmPages.display(owner, assets[page[0]:page[1]])
+        AmPages.fill_enum_items(self._enum_items, assets, page,
+                                self._matches)
+
+        self._enum_generation = (self._sorted.generation, owner.generation,
+                                 page)
         return self._enum_items
 
     @property
     def sorted(self):
-        return sorted(self._assets, key=lambda asset: asset.name.lower())
+        return self._sorted.assets
 
     def clear_search(self):
+        self.cancel()
+        # the previews of the results are released, the view may no
+        # longer be drawn
+        AmPages.display(self._previews_owner, [])
         self._assets.clear()
+        self._matches.clear()
+        self._sorted.clear()
         self.clear_tags()
+        self.facets = AmFacets(types=(self._id,))
         self._active_index = 0
         self.active = None
 
@@ -1195,5 +2101,9 @@ class _AmFilterSearchName:
         self.materials = AmAssetFilter('materials')
         self.hdri = AmAssetFilter('hdri')
 
+    def cancel(self):
+        for filter in (self.assets, self.scenes, self.materials, self.hdri):
+            filter.cancel()
+
 
 AmFilterSearchName = _AmFilterSearchName()
@@ -0,0 +1,290 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import time
+
+from array import array
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from .AmSearch import SearchIndex
+
+
+class AmFacets:
+    """
+    Criteria of the faceted filtering, a criterion set to 0 is not used.
+    The assets whose number of faces or textures size is unknown (not
+    saved in the catalog) are excluded when these criteria are used.
+    """
+
+    # 'SCORE' keeps the order of the searched assets, the assets are sorted
+    # by name if they have not been searched
+    SORT_KEYS = ('SCORE', 'NAME', 'SIZE', 'DATE', 'FACES', 'TEXTURES')
+
+    def __init__(self, types=(), max_size=0, modified_within=0, max_faces=0,
+                 max_textures_size=0, sort='SCORE', reverse=False):
+        """
+        @param types: Iterable, names of the asset types, all if empty
+        @param max_size: Int, maximum file size in bytes
+        @param modified_within: Int, maximum age of the file in seconds
+        @param max_faces: Int
+        @param max_textures_size: Int, maximum size of the textures in bytes
+        @param sort: String, one of SORT_KEYS
+        @param reverse: Bool, sort in descending order
+        """
+        self.types = tuple(types)
+        self.max_size = max_size
+        self.modified_within = modified_within
+        self.max_faces = max_faces
+        self.max_textures_size = max_textures_size
+        self.sort = sort
+        self.reverse = reverse
+
+    @property
+    def has_criteria(self):
+        return bool(self.max_size or self.modified_within or
+                    self.max_faces or self.max_textures_size)
+
+    @property
+    def is_active(self):
+        """
+        The assets are filtered or sorted by their metadata
+        """
+        return self.has_criteria or self.sort != 'SCORE'
+
+
+class _AmColumns:
+    """
+    Metadata of the indexed assets of an asset type stored by column: name
+    order, file size, modification time, faces and textures size
+    """
+
+    def __init__(self, assets):
+        """
+        @param assets: List, indexed assets of the asset type
+        """
+        self.assets = []
+        sizes = array('q')
+        mtimes = array('q')
+        faces = array('q')
+        textures = array('q')
+
+        for asset in assets:
+            # AmAsset or AmAssetEntry of a category which is not loaded
+            if not asset.is_registered:
+                continue
+            try:
+                size, mtime = asset.stat
+                stats = asset.stats
+            except OSError:
+                continue
+            self.assets.append(asset)
+            sizes.append(size)
+            mtimes.append(mtime)
+            # -1 when the stat is unknown
+            faces.append(stats.get('faces', -1))
+            textures.append(stats.get('textures_size', -1))
+
+        names = array('q', bytes(8 * len(self.assets)))
+        for rank, row in enumerate(sorted(
+                range(len(self.assets)), key=lambda row: (
+                        self.assets[row].name.lower(), self.assets[row].id))):
+            names[row] = rank
+
+        self.columns = {'NAME': names,
+                        'SIZE': sizes,
+                        'DATE': mtimes,
+                        'FACES': faces,
+                        'TEXTURES': textures}
+        if numpy is not None:
+            self.columns = {key: numpy.frombuffer(column, dtype=numpy.int64)
+                            for key, column in self.columns.items()}
+        # {asset: row}
+        self.rows = {asset: row for row, asset in enumerate(self.assets)}
+
+    def _select_numpy(self, rows, criteria, sort, reverse):
+        if rows is None:
+            rows = numpy.arange(len(self.assets))
+        else:
+            rows = numpy.fromiter(rows, dtype=numpy.int64, count=len(rows))
+
+        mask = numpy.ones(len(rows), dtype=bool)
+        for key, minimum, maximum in criteria:
+            column = self.columns[key][rows]
+            if minimum is not None:
+                mask &= column >= minimum
+            if maximum is not None:
+                mask &= column <= maximum
+        rows = rows[mask]
+
+        if sort is not None:
+            column = self.columns[sort][rows]
+            order = numpy.argsort(-column if reverse else column,
+                                  kind='stable')
+            rows = rows[order]
+        return rows.tolist()
+
+    def _select_python(self, rows, criteria, sort, reverse):
+        if rows is None:
+            rows = range(len(self.assets))
+
+        for key, minimum, maximum in criteria:
+            column = self.columns[key]
+            if minimum is not None:
+                rows = [row for row in rows if column[row] >= minimum]
+            if maximum is not None:
+                rows = [row for row in rows if column[row] <= maximum]
+
+        if sort is not None:
+            column = self.columns[sort]
+            # sorted is stable in both orders
+            rows = sorted(rows, key=column.__getitem__, reverse=reverse)
+        return list(rows)
+
+    def select(self, rows, criteria, sort, reverse):
+        """
+        @param rows: List, rows to filter, all the rows if None
+        @param criteria: List, [(column, minimum, maximum)]
+        @param sort: String, column sorting the rows, None to keep their
+        order
+        @param reverse: Bool, sort in descending order
+        @return: List, rows
+        """
+        if numpy is not None:
+            return self._select_numpy(rows, criteria, sort, reverse)
+        return self._select_python(rows, criteria, sort, reverse)
+
+
+class AmMetadataStore:
+    """
+    Columns of metadata of the indexed assets by asset type. The criteria
+    of the facets are evaluated on whole columns, as vectorized masks and
+    argsorts when NumPy is available, with the arrays of the standard
+    library otherwise.
+    The columns of an asset type are built again the first time they are
+    used after assets of the asset type have been added or discarded or
+    after one of its catalogs has been read again. The tags and the
+    datablocks indexed by the searches don't outdate them.
+    """
+
+    def __init__(self):
+        # {asset type: (generation, _AmColumns)}
+        self._columns = {}
+        # {asset type: Int}, incremented when a catalog is read again
+        self._catalog_generations = {}
+
+    def invalidate(self, type_id):
+        """
+        Called when a catalog of the asset type has to be read again
+        @param type_id: String, name of the asset type
+        """
+        self._catalog_generations[type_id] = \
+            self._catalog_generations.get(type_id, 0) + 1
+
+    def clear(self):
+        self._columns.clear()
+
+    def _get_generation(self, type_id):
+        return (SearchIndex.get_assets_generation(type_id),
+                self._catalog_generations.get(type_id, 0))
+
+    def _get_columns(self, type_id):
+        entry = self._columns.get(type_id)
+        if entry is not None and entry[0] == self._get_generation(type_id):
+            return entry[1]
+
+        columns = _AmColumns(SearchIndex.get_assets(type_id))
+        # read once built, reading the catalogs while building must not
+        # outdate the columns
+        self._columns[type_id] = (self._get_generation(type_id), columns)
+        return columns
+
+    @staticmethod
+    def _get_criteria(facets):
+        """
+        @return: List, [(column, minimum, maximum)]
+        """
+        criteria = []
+        if facets.max_size:
+            criteria.append(('SIZE', 0, facets.max_size))
+        if facets.modified_within:
+            modified_after = time.time_ns() - facets.modified_within * 10**9
+            criteria.append(('DATE', modified_after, None))
+        if facets.max_faces:
+            criteria.append(('FACES', 0, facets.max_faces))
+        if facets.max_textures_size:
+            criteria.append(('TEXTURES', 0, facets.max_textures_size))
+        return criteria
+
+    def select(self, facets, candidates=None, sort=True):
+        """
+        Return the assets matching the facets
+        @param facets: AmFacets
+        @param candidates: List, assets to filter, all the indexed assets of
+        the asset types of the facets if None
+        @param sort: Bool, sort the assets with the sort key of the facets,
+        otherwise the order of the candidates is kept
+        @return: List, assets
+        """
+        criteria = self._get_criteria(facets)
+        sort_key = None
+        if sort and facets.sort != 'SCORE':
+            sort_key = facets.sort
+        elif sort and candidates is None:
+            sort_key = 'NAME'
+
+        # [(columns, rows)] of each asset type
+        selected = []
+        for type_id in facets.types or SearchIndex.get_types():
+            columns = self._get_columns(type_id)
+            rows = None
+            if candidates is not None:
+                rows = [columns.rows[asset] for asset in candidates if
+                        asset in columns.rows]
+            selected.append((columns, columns.select(rows, criteria, sort_key,
+                                                     facets.reverse)))
+
+        if len(selected) == 1:
+            columns, rows = selected[0]
+            return [columns.assets[row] for row in rows]
+
+        # the assets of several asset types are sorted together
+        assets = [columns.assets[row] for columns, rows in selected for row
+                  in rows]
+        if sort_key == 'NAME':
+            assets.sort(key=lambda asset: (asset.name.lower(), asset.id),
+                        reverse=facets.reverse)
+        elif sort_key is not None:
+            values = [int(columns.columns[sort_key][row]) for columns, rows in
+                      selected for row in rows]
+            order = sorted(range(len(assets)), key=values.__getitem__,
+                           reverse=facets.reverse)
+            assets = [assets[idx] for idx in order]
+        elif candidates is not None:
+            positions = {asset: idx for idx, asset in enumerate(candidates)}
+            assets.sort(key=positions.__getitem__)
+        return assets
+
+
+MetadataStore = AmMetadataStore()
@@ -743,6 +743,7 @@ class ASSETM_OT_save_asset(Operator, AmExportHelper):
             self.run_background_processing(
                     OBJECT_POST_PROCESS, asset,
                     f"data_type:{io_objects.objects_from}")
+            self.category.assets.reload_catalog()
 
             thumbnailer = Thumbnailer()
             if self._is_renderable(io_objects):
@@ -1089,6 +1090,7 @@ class ASSETM_OT_save_material(Operator, AmExportHelper):
                                            f"scn_mat:{material.name}")
 
         if saved_materials:
+            self.category.assets.reload_catalog()
             thumbnailer = Thumbnailer()
             if io_materials.thumbnailer in {'BLENDER_EEVEE', 'CYCLES'}:
                 data_paths = [am_mat.path for am_mat, to_render in
@@ -1182,6 +1184,7 @@ class ASSETM_OT_save_scene(Operator, AmExportHelper):
                                     copy=True)
 
         self.run_background_processing(SCENE_POST_PROCESS, am_asset)
+        self.category.assets.reload_catalog()
 
         self.category.assets.active = am_asset
         am_asset.load_icon()
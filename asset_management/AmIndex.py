@@ -0,0 +1,687 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import os
+import time
+import threading
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .AmUtils import AmJson
+from .ressources.constants import (ASSET_TYPE,
+                                   MANIFEST_FILENAME,
+                                   RESERVED_FOLDERS,
+                                   SUPPORTED_FILES,
+                                   SUPPORTED_ICONS)
+
+
+class AmCategoryCensus:
+    """
+    Content of a category read in a single pass of its folders, the
+    category folder and, for the assets saved in a 'files' folder, the
+    'files' and 'icons' folders.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        # [(filename, from_root)]
+        self.assets = []
+        # {asset id: (size, mtime)}
+        self.stats = {}
+        # {icon folder: [icon filenames]}
+        self.icons = {}
+        # paths of the TEX_ folders
+        self.textures = set()
+
+    def add_folder(self, path, dirs, files, stats, from_root):
+        self.textures.update(os.path.join(path, dir_) for dir_ in dirs if
+                             dir_.startswith("TEX_"))
+
+        icons = self.icons.setdefault(path, []) if from_root else None
+        for filename in files:
+            ext = os.path.splitext(filename)[-1].lower()
+            if ext in SUPPORTED_FILES:
+                self.assets.append((filename, from_root))
+                stat = stats.get(filename)
+                if stat is not None:
+                    id_ = filename if from_root else os.path.join("files",
+                                                                  filename)
+                    self.stats[id_] = tuple(stat)
+            elif from_root and ext in SUPPORTED_ICONS:
+                icons.append(filename)
+
+    def add_icons(self, path, files):
+        self.icons[path] = [filename for filename in files if
+                            filename.lower().endswith(SUPPORTED_ICONS)]
+
+
+class AmLibraryIndex:
+    """
+    Persistent listing of the library folders.
+    Each folder is stored with its modification time, so an unchanged
+    folder is read back from the index instead of being listed again and
+    only the folders modified since the last session are rescanned.
+    The size and the modification time of the files are not stored, a
+    file modified in place doesn't modify its folder. They are returned
+    when the folder is listed and read when needed otherwise.
+    The folders are read from the thread of the LibrariesLoader while the
+    main thread may save the index, the dicts are modified and iterated
+    under a lock.
+    """
+
+    VERSION = 3
+
+    MANIFEST_VERSION = 2
+
+    # A folder modified less than 2 seconds ago is not stored, some file
+    # systems have a coarse mtime resolution and a change made in the same
+    # tick would not be detected.
+    _SETTLE_TIME = 2 * 10**9
+
+    def __init__(self):
+        self._entries = {}
+        self._prefetched = {}
+        # folders of the libraries loaded from their manifest
+        self._manifests = {}
+        self._manifest_roots = set()
+        self._filepath = None
+        self.enabled = False
+        self._lock = threading.RLock()
+
+    def load(self, filepath):
+        """
+        Load the index file
+        @param filepath: String, path of the index file
+        """
+        self._filepath = filepath
+        with self._lock:
+            self._entries.clear()
+            self._manifests.clear()
+            self._manifest_roots.clear()
+        if not self.enabled:
+            return
+
+        try:
+            content = AmJson.load_json_file(filepath)
+        except ValueError:
+            print(f"{filepath}: Corrupted library index, the libraries will "
+                  f"be rescanned")
+            return
+
+        if content is None or content.get('version') != self.VERSION:
+            return
+
+        with self._lock:
+            self._entries.update(content.get('entries', {}))
+
+    def save(self, roots):
+        """
+        Save the index file, only the folders belonging to one of the given
+        libraries are kept
+        @param roots: Iterable, paths of the registered libraries
+        """
+        if not self.enabled or self._filepath is None:
+            return
+
+        roots = tuple(roots)
+        prefixes = tuple(f"{root}{os.sep}" for root in roots)
+        with self._lock:
+            entries = {path: entry for path, entry in self._entries.items()
+                       if path in roots or path.startswith(prefixes)}
+
+        AmJson.save_as_json_file(self._filepath,
+                                 {'version': self.VERSION,
+                                  'entries': entries},
+                                 indent=None)
+
+    def invalidate(self, path):
+        """
+        Remove the folder and all its sub folders from the index
+        @param path: String, path of the folder
+        """
+        prefix = f"{path}{os.sep}"
+        with self._lock:
+            for entries in (self._entries, self._prefetched,
+                            self._manifests):
+                for key in [key for key in entries if key == path or
+                            key.startswith(prefix)]:
+                    del entries[key]
+
+    def expire(self, *paths):
+        """
+        The folders have been modified since the manifest of their library
+        has been built, they are read from the disk from now on
+        @param paths: Strings, paths of the folders
+        """
+        with self._lock:
+            for path in paths:
+                self._manifests.pop(path, None)
+
+    def get_mtime(self, path):
+        """
+        Return the modification time of the folder when it has been read,
+        without accessing the disk
+        @param path: String, path of the folder
+        @return: Int, mtime in nanoseconds or None if unknown
+        """
+        entry = self._manifests.get(path) or self._entries.get(path)
+        return entry['mtime'] if entry is not None else None
+
+    @staticmethod
+    def list_dir(path, with_stats=True):
+        """
+        List the content of the folder in a single pass. The size and the
+        modification time are only read for the asset files.
+        @param path: String, path of the folder
+        @param with_stats: Bool, False to skip the stat of the asset files,
+        they are then read when needed
+        @return: Tuple, (dirs, files, {filename: (size, mtime)})
+        """
+        dirs = []
+        files = []
+        stats = {}
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    dirs.append(entry.name)
+                    continue
+
+                files.append(entry.name)
+                if with_stats and os.path.splitext(entry.name)[-1].lower() \
+                        in SUPPORTED_FILES:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    stats[entry.name] = (stat.st_size, stat.st_mtime_ns)
+
+        return dirs, files, stats
+
+    def read(self, path):
+        """
+        Return the content of the folder, from the index if it has not been
+        modified. Can be called from several threads.
+        @param path: String, path of the folder
+        @return: Tuple, (dirs, files, {filename: (size, mtime)})
+        """
+        remote = StatCache.is_remote(path)
+        if not self.enabled:
+            dirs, files, stats = self.list_dir(path, with_stats=not remote)
+            if remote:
+                StatCache.prime(path, dirs, files)
+            return dirs, files, stats
+
+        mtime = os.stat(path).st_mtime_ns
+        entry = self._entries.get(path)
+        if entry is not None and entry['mtime'] == mtime:
+            dirs, files, stats = entry['dirs'], entry['files'], {}
+        else:
+            dirs, files, stats = self.list_dir(path, with_stats=not remote)
+            entry = {'mtime': mtime, 'dirs': dirs, 'files': files}
+            with self._lock:
+                if time.time_ns() - mtime > self._SETTLE_TIME:
+                    self._entries[path] = entry
+                else:
+                    self._entries.pop(path, None)
+
+        if remote:
+            StatCache.prime(path, dirs, files)
+
+        return list(dirs), list(files), stats
+
+    def prefetch(self, tree):
+        """
+        Install the folders read by AmLibraryScanner. They are returned by
+        walk without accessing the disk until clear_prefetched is called.
+        @param tree: Dict, {path: (dirs, files, stats)}
+        """
+        with self._lock:
+            self._prefetched.update(tree)
+
+    def clear_prefetched(self):
+        with self._lock:
+            self._prefetched.clear()
+
+    def _get(self, path):
+        prefetched = self._prefetched.get(path)
+        if prefetched is not None:
+            dirs, files, stats = prefetched
+            return list(dirs), list(files), dict(stats)
+
+        entry = self._manifests.get(path)
+        if entry is not None:
+            # an asset or a category added in a folder doesn't modify the
+            # asset types, each folder is checked when it is read, a stat
+            # is cheaper than listing it
+            try:
+                up_to_date = os.stat(path).st_mtime_ns == entry['mtime']
+            except OSError:
+                up_to_date = False
+            if up_to_date:
+                return list(entry['dirs']), list(entry['files']), {}
+            self.expire(path)
+
+        return self.read(path)
+
+    @staticmethod
+    def _walk_library(root):
+        """
+        Yield the folders of the library read when it is loaded: asset
+        types, categories and their 'files' and 'icons' folders
+        """
+        pending = [(root, 0)]
+        while pending:
+            path, level = pending.pop()
+            # the stats of the files are not saved, like in the index
+            dirs, files, stats = AmLibraryIndex.list_dir(path,
+                                                         with_stats=False)
+            yield path, {'mtime': os.stat(path).st_mtime_ns, 'dirs': dirs,
+                         'files': files}
+
+            if level == 0:
+                pending.extend((os.path.join(path, dir_), 1) for dir_ in
+                               dirs if dir_ in ASSET_TYPE)
+                continue
+            if level == 2:
+                continue
+
+            pending.extend((os.path.join(path, dir_), 1) for dir_ in dirs if
+                           dir_ not in RESERVED_FOLDERS and not
+                           dir_.startswith("TEX_"))
+            if "files" in dirs and "icons" in dirs:
+                pending.extend((os.path.join(path, dir_), 2) for dir_ in
+                               ("files", "icons"))
+
+    def save_manifest(self, root):
+        """
+        Save the content of the library in a manifest at its root. The
+        clients which can't write in the library load it instead of
+        reading all the folders.
+        @param root: String, path of the library
+        @return: Int, number of folders saved
+        """
+        entries = {}
+        for path, entry in self._walk_library(root):
+            rel_path = os.path.relpath(path, root)
+            # the library may be mounted on Windows and Linux clients
+            entries[rel_path.replace(os.sep, "/")] = entry
+
+        filepath = os.path.join(root, MANIFEST_FILENAME)
+        tmp_filepath = f"{filepath}.{os.getpid()}.tmp"
+        AmJson.save_as_json_file(tmp_filepath,
+                                 {'version': self.MANIFEST_VERSION,
+                                  'entries': entries},
+                                 indent=None)
+        os.replace(tmp_filepath, filepath)
+        return len(entries)
+
+    def load_manifest(self, root):
+        """
+        Load the manifest of the library if it is still up to date, the
+        folders of the library are then read from it. The manifest is up to
+        date when the asset types have not been modified since it has been
+        built. The mtime of the library folder can't be used, it is
+        modified by the writing of the manifest. The other folders are
+        checked when they are read, the modified ones are listed again.
+        @param root: String, path of the library
+        @return: Bool, True if the library can be loaded from its manifest
+        """
+        if root in self._manifest_roots:
+            return True
+
+        filepath = os.path.join(root, MANIFEST_FILENAME)
+        try:
+            content = AmJson.load_json_file(filepath)
+        except (OSError, ValueError) as e:
+            print(f"{filepath}: The manifest can't be read\n\t{e}")
+            return False
+
+        if content is None or \
+                content.get('version') != self.MANIFEST_VERSION:
+            return False
+
+        entries = {root if rel_path == "." else os.path.join(
+                   root, *rel_path.split("/")): entry for rel_path, entry in
+                   content.get('entries', {}).items()}
+
+        library = entries.get(root)
+        if library is None:
+            return False
+
+        asset_types = [dir_ for dir_ in library['dirs'] if dir_ in ASSET_TYPE]
+        try:
+            up_to_date = sorted(asset_types) == sorted(
+                    dir_ for dir_ in os.listdir(root) if dir_ in ASSET_TYPE)
+            for dir_ in asset_types:
+                path = os.path.join(root, dir_)
+                entry = entries.get(path)
+                up_to_date = up_to_date and entry is not None and \
+                    entry['mtime'] == os.stat(path).st_mtime_ns
+        except OSError:
+            up_to_date = False
+
+        if not up_to_date:
+            print(f"{root}: The manifest is out of date, the library will "
+                  f"be scanned")
+            return False
+
+        with self._lock:
+            self._manifests.update(entries)
+            self._manifest_roots.add(root)
+        return True
+
+    def is_manifest_loaded(self, root):
+        return root in self._manifest_roots
+
+    def get_outdated(self, root):
+        """
+        Return the folders of the library whose content saved in the index
+        or in the manifest no longer matches the disk
+        @param root: String, path of the library
+        @return: List, paths of the folders
+        """
+        prefix = f"{root}{os.sep}"
+        outdated = set()
+        with self._lock:
+            folders = [(path, entry) for entries in (self._entries,
+                                                     self._manifests)
+                       for path, entry in entries.items() if
+                       path.startswith(prefix) or (
+                               path == root and entries is self._entries)]
+
+        for path, entry in folders:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != entry['mtime']:
+                outdated.add(path)
+
+        return sorted(outdated)
+
+    def walk(self, path):
+        """
+        Drop-in replacement of next(os.walk(path)) which reads the content
+        of the folder from the index when it has not been modified
+        @param path: String, path of the folder
+        @return: Tuple, (path, dirs, files)
+        """
+        dirs, files, stats = self._get(path)
+        return path, dirs, files
+
+    def census(self, path):
+        """
+        Read the content of a category without writing anything on the disk.
+        Each folder is read once.
+        @param path: String, path of the category
+        @return: AmCategoryCensus
+        """
+        census = AmCategoryCensus(path)
+        dirs, files, stats = self._get(path)
+        census.add_folder(path, dirs, files, stats, from_root=True)
+
+        if "files" in dirs and "icons" in dirs:
+            files_path = os.path.join(path, "files")
+            census.add_folder(files_path, *self._get(files_path),
+                              from_root=False)
+            icons_path = os.path.join(path, "icons")
+            census.add_icons(icons_path, self._get(icons_path)[1])
+
+        return census
+
+
+class AmLibraryScanner:
+    """
+    Read the folders of several libraries concurrently. The libraries are
+    mostly stored on network shares where the time is spent waiting for
+    the server, so the folders are read by a bounded pool of threads. The
+    scanner only reads the disk, the returned tree is installed in the
+    LibraryIndex and the Library objects are created from the main thread.
+    """
+
+    _LIBRARY = 0
+    _ASSET_TYPE = 1
+    _CATEGORY = 2
+    _FILES = 3
+
+    def __init__(self, index, max_workers=8):
+        self._index = index
+        self._max_workers = max(1, max_workers)
+
+    def _children(self, path, level, dirs, include_assets):
+        if level == self._LIBRARY:
+            return [(os.path.join(path, dir_), self._ASSET_TYPE) for dir_ in
+                    dirs if dir_ in ASSET_TYPE]
+
+        if level == self._FILES:
+            return []
+
+        children = [(os.path.join(path, dir_), self._CATEGORY) for dir_ in
+                    dirs if dir_ not in RESERVED_FOLDERS and not
+                    dir_.startswith("TEX_")]
+
+        if include_assets and level == self._CATEGORY and \
+                "files" in dirs and "icons" in dirs:
+            children.append((os.path.join(path, "files"), self._FILES))
+            children.append((os.path.join(path, "icons"), self._FILES))
+
+        return children
+
+    def scan(self, roots, include_assets=True):
+        """
+        Read the folders of the libraries
+        @param roots: Iterable, paths of the libraries
+        @param include_assets: Bool, also read the 'files' folders of the
+        categories
+        @return: Dict, {path: (dirs, files, stats)}
+        """
+        tree = {}
+
+        with ThreadPoolExecutor(max_workers=self._max_workers) as pool:
+            pending = {pool.submit(self._index.read, root): (root,
+                                                             self._LIBRARY)
+                       for root in roots}
+
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, level = pending.pop(future)
+                    try:
+                        dirs, files, stats = future.result()
+                    except OSError as e:
+                        print(f"{path}:\n\t{e}")
+                        continue
+
+                    tree[path] = (dirs, files, stats)
+                    for child, child_level in self._children(
+                            path, level, dirs, include_assets):
+                        pending[pool.submit(self._index.read, child)] = (
+                            child, child_level)
+
+        return tree
+
+
+class AmStatCache:
+    """
+    Existence checks of the files and folders of the remote libraries.
+    On a network share each os.path.exists is a round trip to the server,
+    instead the content of the folders is kept for a few seconds and a
+    single listing answers the checks of all the files of a folder. The
+    folders read by the LibraryIndex are added to the cache for free.
+    The paths of the other libraries are checked on the disk.
+    """
+
+    def __init__(self):
+        # time in seconds during which a listing is trusted
+        self.ttl = 10.0
+        self._roots = frozenset()
+        self._prefixes = ()
+        # {folder path: (time, dirs, files)}
+        self._folders = {}
+        self._lock = threading.Lock()
+        # checks answered from the cache
+        self.avoided = 0
+        # folders listed to answer the checks
+        self.reads = 0
+
+    @property
+    def remote_roots(self):
+        return self._roots
+
+    def set_remote(self, roots):
+        """
+        @param roots: Iterable, paths of the remote libraries
+        """
+        self._roots = frozenset(roots)
+        self._prefixes = tuple(f"{root}{os.sep}" for root in self._roots)
+        self.clear()
+
+    def is_remote(self, path):
+        return path in self._roots or path.startswith(self._prefixes)
+
+    def prime(self, path, dirs, files):
+        """
+        Store the content of a folder which has just been listed
+        """
+        with self._lock:
+            self._folders[path] = (time.monotonic(), frozenset(dirs),
+                                   frozenset(files))
+
+    def invalidate(self, path):
+        """
+        Forget the content of the folder and of its parent, called when the
+        addon modifies the folder
+        """
+        with self._lock:
+            self._folders.pop(path, None)
+            self._folders.pop(os.path.dirname(path), None)
+
+    def clear(self):
+        with self._lock:
+            self._folders.clear()
+        self.avoided = 0
+        self.reads = 0
+
+    def _read_folder(self, path):
+        self.reads += 1
+        try:
+            dirs, files, stats = AmLibraryIndex.list_dir(path,
+                                                         with_stats=False)
+        except OSError:
+            dirs = files = ()
+        self.prime(path, dirs, files)
+        return frozenset(dirs), frozenset(files)
+
+    def _contains(self, path, dirs_only):
+        """
+        Only the found paths are answered from the cache, a missing one is
+        checked again on the disk, it may have just been created
+        """
+        parent, name = os.path.split(path)
+        with self._lock:
+            folder = self._folders.get(parent)
+
+        if folder is not None and time.monotonic() - folder[0] < self.ttl:
+            if name in folder[1] or (not dirs_only and name in folder[2]):
+                self.avoided += 1
+                return True
+
+        dirs, files = self._read_folder(parent)
+        return name in dirs or (not dirs_only and name in files)
+
+    def exists(self, path):
+        if not self.is_remote(path):
+            return os.path.exists(path)
+        return self._contains(path, dirs_only=False)
+
+    def isdir(self, path):
+        if not self.is_remote(path):
+            return os.path.isdir(path)
+        return self._contains(path, dirs_only=True)
+
+
+class AmPathIndex:
+    """
+    Index of the loaded libraries, asset types, categories and assets by
+    path. The items register themselves when they are created and
+    unregister when they are removed, so the lookups by path don't walk
+    the libraries.
+    """
+
+    def __init__(self):
+        self._items = {}
+
+    def register(self, path, item):
+        self._items[path] = item
+
+    def unregister(self, path, item=None):
+        """
+        Remove the path from the index
+        @param path: String
+        @param item: Object, only remove the path if it is registered for
+        this item
+        """
+        if item is None or self._items.get(path) is item:
+            self._items.pop(path, None)
+
+    def unregister_tree(self, path):
+        """
+        Remove the path and all the paths it contains from the index
+        @param path: String
+        """
+        prefix = f"{path}{os.sep}"
+        for key in [key for key in self._items if key == path or
+                    key.startswith(prefix)]:
+            del self._items[key]
+
+    def clear(self):
+        self._items.clear()
+
+    def get(self, path):
+        return self._items.get(path)
+
+    def find(self, path, types):
+        """
+        Return the item of the given types registered for the path or for
+        the closest parent folder
+        @param path: String
+        @param types: Class or tuple of classes
+        @return: Object or None
+        """
+        while True:
+            item = self._items.get(path)
+            if item is not None and isinstance(item, types):
+                return item
+            parent = os.path.dirname(path)
+            if parent == path:
+                return None
+            path = parent
+
+
+LibraryIndex = AmLibraryIndex()
+
+StatCache = AmStatCache()
+
+PathIndex = AmPathIndex()
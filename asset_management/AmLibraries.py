@@ -21,22 +21,33 @@
 
 import bpy
 import os
+import sys
+import queue
 import shutil
-from pathlib import Path
+import threading
 
-from .AmUtils import *
-from .AmCore import AmAssets, AmAsset
+from .AmUtils import AmJson, AmPath, AmName, addon_prefs
+from .AmCore import AmAssets, AmAsset, AmAssetEntry
+from .AmCatalog import AmCatalog
+from .AmSearch import SearchIndex, SearchCache, ContentIndexer
+from .AmFacets import MetadataStore
+from .AmBlend import BlendReader
+from .AmIndex import LibraryIndex, PathIndex, StatCache, AmLibraryScanner
 
 from .ressources.constants import (ASSET_TYPE,
-                                   AM_DATAS,
+                                   RESERVED_FOLDERS,
                                    ORDERED_TYPES,
-                                   AM_UI_SETTINGS)
-from .t3dn_bip import previews
+                                   AM_UI_SETTINGS,
+                                   AM_LIBRARIES,
+                                   AM_LIBRARIES_INDEX,
+                                   AM_LIBRARIES_UPGRADE,
+                                   AM_REMOTE_LIBRARIES,
+                                   AM_BLEND_CONTENTS)
 
 class Library:
 
     def __init__(self, path):
-        self._path = path
+        self._path = sys.intern(path)
 
         self.asset_types = AssetTypeCollection(self)
 
@@ -48,12 +59,21 @@ class Library:
     def path(self):
         return self._path
 
+    @property
+    def remote(self):
+        """
+        The library is stored on a network share, the existence checks go
+        through the StatCache
+        """
+        return self._path in StatCache.remote_roots
+
 
 class AssetType:
 
     def __init__(self, name, parent):
         self._parent_library = parent
         self._name = name
+        self._path = sys.intern(os.path.join(parent.path, name))
 
         self.categories = CategoryCollection(self)
         self._active_category = None
@@ -68,7 +88,7 @@ class AssetType:
 
     @property
     def path(self):
-        return os.path.join(self._parent_library.path, self._name)
+        return self._path
 
     @property
     def active_category(self):
@@ -113,67 +133,128 @@ class CategoriesCore(dict):
         dict.__init__(self)
         # The parent can be either an AssetType or a Category object
         self._parent = parent
+        self._mtime = None
 
     def _new(self, name):
         category = Category(name, self._parent)
         self[category.path] = category
+        PathIndex.register(category.path, category)
         return category
 
-    def _convert_blend_to_file(self, name):
-        src = os.path.join(os.path.join(self._parent.path, name,
-                                        'blends'))
-        dst = os.path.join(os.path.join(self._parent.path, name,
-                                        'files'))
-        os.rename(src, dst)
-
-    def add(self, name):
+    def _load(self, name):
         """
-        Add a new category
+        Load an existing category and its sub categories, nothing is
+        written on the disk
         :param name: String, name of the category
-        :return: Object, created category
+        :return: Object, loaded category
         """
-        if os.path.exists(os.path.join(self._parent.path, name)):
-            dirs = next(os.walk(os.path.join(self._parent.path, name)))[1]
-            if "blends" in dirs:
-                self._convert_blend_to_file(name)
-
-        if name in ('files', 'blends', 'icons', 'favorites') or \
-                name.startswith("TEX_"):
+        if name in RESERVED_FOLDERS or name.startswith("TEX_"):
             return
 
-        path = AmPath.get_folder(self._parent.path, name)
+        path = os.path.join(self._parent.path, name)
+        dirs = LibraryIndex.walk(path)[1]
         category = self._new(name)
+        category.categories._mtime = LibraryIndex.get_mtime(path)
 
-        dirs = next(os.walk(path))[1]
         for dir_ in dirs:
-            category.categories.add(dir_)
+            category.categories._load(dir_)
 
         return category
 
+    def add(self, name):
+        """
+        Add a new category, its folder is created if it doesn't exist
+        :param name: String, name of the category
+        :return: Object, created category
+        """
+        if name in RESERVED_FOLDERS or name.startswith("TEX_"):
+            return
+
+        AmPath.get_folder(self._parent.path, name)
+        return self._load(name)
+
     def remove(self, category):
         if category.categories:
             sub_categories = list(category.categories.values())
             for cat in sub_categories:
                 category.categories.remove(cat)
-        pcoll = category.assets.pcoll
-        if pcoll is not None:
-            previews.remove(pcoll)
+        if category.is_loaded:
+            for asset in category.assets:
+                SearchIndex.discard(asset)
+                PathIndex.unregister(asset.path, asset)
+            category.assets.remove_previews()
+        else:
+            category.discard_entries()
+        PathIndex.unregister(category.path, category)
         del self[category.path]
         del category
 
+    def refresh(self, recursive=True, force=False):
+        """
+        Synchronise the sub categories with the folders. Only the added and
+        removed folders are processed, the existing categories are kept with
+        their previews and their status.
+        :param recursive: Bool, also refresh the sub categories and their
+        assets
+        :param force: Bool, list the folder even if its modification time
+        has not changed
+        """
+        path = self._parent.path
+        added = []
+        mtime = AmPath.get_mtime(path)
+        if force or mtime != self._mtime:
+            self._mtime = mtime
+            LibraryIndex.expire(path)
+            dirs = LibraryIndex.walk(path)[1]
+            for category in [cat for cat in self.values() if cat.name not in
+                             dirs]:
+                self.remove(category)
+
+            for name in dirs:
+                if os.path.join(path, name) not in self:
+                    added.append(self._load(name))
+
+        if not recursive:
+            return
+
+        for category in self.values():
+            if category in added:
+                continue
+            category.categories.refresh()
+            if category.is_loaded:
+                category.assets.refresh()
+            else:
+                category.refresh_entries()
+
     @property
     def sorted(self):
         return AmPath.sort_path_by_name(self.keys())
 
 
 class Category:
+
+    # The categories are never renamed or moved in place, a new category is
+    # created, so the path is built once
+    __slots__ = ('_name', '_parent', '_asset_type', '_path', '_categories',
+                 'expanded', '_pinned', '_assets', '_entries')
+
     def __init__(self, name, parent):
         self._name = name
         self._parent = parent
+        self._asset_type = parent if isinstance(parent, AssetType) else \
+            parent.parent_asset_type
+        self._path = sys.intern(os.path.join(parent.path, name))
         self._categories = CategoriesCore(self)
         self.expanded = False
         self._pinned = False
-        self._assets = AmAssets(self)
+        self._assets = None
+        # (folders mtimes, [AmAssetEntry]) of the assets indexed without
+        # being loaded
+        self._entries = None
+        if not addon_prefs().libraries.lazy_loading:
+            self._assets = AmAssets(self)
+        else:
+            SearchIndex.mark_incomplete(self._asset_type.name)
 
     @property
     def preview(self):
@@ -182,11 +263,11 @@ class Category:
 
     @property
     def active_asset(self):
-        return self._assets.active
+        return self.assets.active
 
     def set_active_asset_from_path(self, path):
         asset = LibrariesManager.get_asset_from_path(self, path)
-        self._assets.active = asset
+        self.assets.active = asset
 
     @property
     def name(self):
@@ -198,7 +279,7 @@ class Category:
 
     @property
     def path(self):
-        return os.path.join(self._parent.path, self.name)
+        return self._path
 
     @property
     def categories(self):
@@ -210,7 +291,13 @@ class Category:
 
     @pinned.setter
     def pinned(self, status):
-        if self._assets:
+        if not status and not self.is_loaded:
+            # A category whose assets have never been loaded can't be
+            # pinned, no need to load them to unpin it
+            self._pinned = False
+            return
+
+        if self.assets:
             am = bpy.context.window_manager.asset_management
             active_category = self.parent_asset_type.active_category
             pinned_count = len(LibrariesManager.pinned_categories())
@@ -237,19 +324,69 @@ class Category:
 
     @property
     def assets(self):
+        """
+        Returns the assets of the category. In lazy loading mode, the
+        assets are loaded the first time they are requested.
+        @return: AmAssets Object
+        """
+        if self._assets is None:
+            self.discard_entries()
+            self._assets = AmAssets(self)
         return self._assets
 
+    @property
+    def is_loaded(self):
+        return self._assets is not None
+
+    def _get_mtimes(self):
+        return [AmPath.get_mtime(self._path),
+                AmPath.get_mtime(os.path.join(self._path, "files"))]
+
+    def index_entries(self):
+        """
+        Index the assets of the category for the searches without loading
+        them, nothing is done if the category is loaded or already indexed
+        """
+        if self._assets is not None or self._entries is not None:
+            return
+        mtimes = self._get_mtimes()
+        census = LibraryIndex.census(self._path)
+        catalog = AmCatalog.load(self._path)
+        entries = []
+        for filename, from_root in census.assets:
+            id_ = filename if from_root else os.path.join("files", filename)
+            entry = AmAssetEntry(self, filename, from_root,
+                                 census.stats.get(id_), catalog)
+            SearchIndex.add(entry, catalog.get(id_, {}).get('tags', ()))
+            entries.append(entry)
+        self._entries = (mtimes, entries)
+
+    def discard_entries(self):
+        if self._entries is None:
+            return
+        for entry in self._entries[1]:
+            SearchIndex.discard(entry)
+        self._entries = None
+
+    def refresh_entries(self, force=False):
+        """
+        Discard the indexed entries if the folders of the category have
+        been modified, they are indexed again by the next search
+        :param force: Bool, discard them even if the modification times of
+        the folders have not changed
+        """
+        if self._entries is not None and \
+                (force or self._entries[0] != self._get_mtimes()):
+            self.discard_entries()
+            SearchIndex.mark_incomplete(self._asset_type.name)
+
     @property
     def parent_asset_type(self):
         """
         Returns the AssetType object class of the asset
         @return: AssetType Object
         """
-        category = self._parent
-        while category.__class__.__name__ != 'AssetType':
-            category = category.parent
-
-        return category
+        return self._asset_type
 
     @property
     def parent_library(self):
@@ -279,15 +416,61 @@ class LibraryCollection(dict):
             self.unvalid_libraries.append(path)
             return
         else:
+            # the folders of the library are read from its manifest when
+            # it is up to date
+            LibraryIndex.load_manifest(path)
             new_lib = Library(path)
             self[path] = new_lib
+            PathIndex.register(path, new_lib)
             return self[path]
 
+    @staticmethod
+    def upgrade(path):
+        """
+        Convert a library created by an older version of the addon, the
+        'blends' folders of the categories are renamed 'files'
+        :param path: String, library path
+        """
+        for root, dirs, files in os.walk(path):
+            if "blends" in dirs and "files" not in dirs:
+                os.rename(os.path.join(root, "blends"),
+                          os.path.join(root, "files"))
+                print(f"{root}: 'blends' folder renamed 'files'")
+            dirs[:] = [dir_ for dir_ in dirs if dir_ not in
+                       RESERVED_FOLDERS and not dir_.startswith("TEX_")]
+
+    def _upgrade_libraries(self, libraries):
+        """
+        Upgrade the libraries which have never been upgraded. This is done
+        once, the libraries are then only read when loading them.
+        :param libraries: List, paths of the libraries
+        """
+        upgraded = []
+        if os.path.exists(AM_LIBRARIES_UPGRADE):
+            upgraded = AmJson.load_json_file(AM_LIBRARIES_UPGRADE)
+
+        pending = [path for path in libraries if path not in upgraded and
+                   os.path.exists(path)]
+        if not pending:
+            return
+
+        for path in pending:
+            try:
+                self.upgrade(path)
+            except OSError as e:
+                print(f"{path}: The library can't be upgraded\n\t{e}")
+                continue
+            LibraryIndex.invalidate(path)
+            upgraded.append(path)
+
+        AmJson.save_as_json_file(AM_LIBRARIES_UPGRADE, upgraded)
+
     def add(self, path):
         """
         Add a new library in the database
         :param path: String, library path
         """
+        self._upgrade_libraries([path])
         library = self._new(path)
         if library is not None:
             library.asset_types.load()
@@ -304,12 +487,10 @@ class LibraryCollection(dict):
         if library is not None:
             for type_ in library.asset_types.values():
                 for category in type_.categories.values():
-                    pcoll = category.assets.pcoll
-                    if pcoll is None:
-                        continue
-                    previews.remove(pcoll)
+                    LibrariesManager._clear_preview_collections(category)
             library.asset_types.clear_types()
             del self[path]
+            PathIndex.unregister_tree(path)
 
             if self.keys():
                 self.active = self.sorted_libraries[0]
@@ -325,20 +506,92 @@ class LibraryCollection(dict):
         """
         Load the libraries from the database
         """
-        self.clear()
-        path = os.path.join(AM_DATAS, "libraries.json")
-        if not os.path.exists(path):
-            return
+        libraries = self.begin_load()
+        self._upgrade_libraries(libraries)
 
-        libraries = AmJson.load_json_file(path)
+        prefs = addon_prefs().libraries
+        if prefs.scan_workers > 1:
+            scanner = AmLibraryScanner(LibraryIndex, prefs.scan_workers)
+            LibraryIndex.prefetch(scanner.scan(
+                    [path for path in libraries if os.path.exists(path) and
+                     not LibraryIndex.load_manifest(path)],
+                    include_assets=not prefs.lazy_loading))
 
         for lib_path in libraries:
-            library = self._new(lib_path)
-            if library is not None:
-                library.asset_types.load()
+            self.load_library(lib_path)
+
+        self.end_load()
+
+    def begin_load(self):
+        """
+        Clear the libraries and read the database
+        :return: List, paths of the libraries to load
+        """
+        self.clear()
+        self._active = None
+        PathIndex.clear()
+        SearchIndex.clear()
+        SearchCache.clear()
+        MetadataStore.clear()
+        ContentIndexer.cancel()
+        if not os.path.exists(AM_LIBRARIES):
+            return []
+
+        libraries = AmJson.load_json_file(AM_LIBRARIES)
+
+        prefs = addon_prefs().libraries
+        ContentIndexer.enabled = prefs.search_contents
+        BlendReader.set_filepath(AM_BLEND_CONTENTS)
+        LibraryIndex.enabled = prefs.use_index
+        LibraryIndex.load(AM_LIBRARIES_INDEX)
+        StatCache.ttl = prefs.stat_cache_ttl
+        self._load_remote()
+
+        return libraries
+
+    @staticmethod
+    def _load_remote():
+        remote = []
+        if os.path.exists(AM_REMOTE_LIBRARIES):
+            remote = AmJson.load_json_file(AM_REMOTE_LIBRARIES)
+        StatCache.set_remote(remote)
+
+    @staticmethod
+    def set_remote(path, remote):
+        """
+        Set if the library is stored on a network share
+        :param path: String, library path
+        :param remote: Bool
+        """
+        roots = set(StatCache.remote_roots)
+        if remote:
+            roots.add(path)
+        else:
+            roots.discard(path)
+        StatCache.set_remote(roots)
+        AmJson.save_as_json_file(AM_REMOTE_LIBRARIES, sorted(roots))
+
+    def load_library(self, path):
+        """
+        Create the library and load its content
+        :param path: String, library path
+        :return: instance of the library, None if the path is not valid
+        """
+        library = self._new(path)
+        if library is not None:
+            library.asset_types.load()
+        return library
+
+    def end_load(self):
+        """
+        Save the index once all the libraries are loaded
+        """
+        LibraryIndex.clear_prefetched()
+        LibraryIndex.save(self.keys())
 
         if self.keys():
-            self.active = self.sorted_libraries[0]
+            if self.active is None:
+                self.active = self.sorted_libraries[0]
             print("Asset Management libraries loaded")
             if self.unvalid_libraries:
                 print("Some library paths are not valid:")
@@ -349,16 +602,50 @@ class LibraryCollection(dict):
         else:
             print("No valid library to load")
 
+    def refresh(self):
+        """
+        Synchronise the libraries with the database and the folders without
+        reloading them. Only the modified categories and assets are
+        processed.
+        """
+        if not os.path.exists(AM_LIBRARIES):
+            return
+
+        libraries = AmJson.load_json_file(AM_LIBRARIES)
+
+        LibraryIndex.enabled = addon_prefs().libraries.use_index
+
+        for path in [path for path in self.keys() if path not in libraries or
+                     not os.path.exists(path)]:
+            self.remove(path)
+
+        self._upgrade_libraries([path for path in libraries if
+                                 path not in self])
+
+        for path in libraries:
+            library = self.get(path)
+            if library is None:
+                library = self._new(path)
+                if library is not None:
+                    library.asset_types.load()
+            else:
+                library.asset_types.refresh()
+
+        if self.active is not None and self.get(self.active.path):
+            # the libraries order may have changed
+            self.active = self.active.path
+        elif self.keys():
+            self.active = self.sorted_libraries[0]
+
+        LibraryIndex.save(self.keys())
+
     def save(self):
         """
         Save the libraries in the database
         """
         # libraries = list(self.keys()) + self.unvalid_libraries
         libraries = list(self.keys())
-        AmJson.save_as_json_file(
-                os.path.join(AM_DATAS, "libraries.json"),
-                libraries
-                )
+        AmJson.save_as_json_file(AM_LIBRARIES, libraries)
 
     @property
     def active(self):
@@ -429,6 +716,7 @@ class AssetTypeCollection(dict):
     def _new(self, aType_id):
         new_type = AssetType(aType_id, self._parent)
         self[aType_id] = new_type
+        PathIndex.register(new_type.path, new_type)
         return self[aType_id]
 
     @property
@@ -450,7 +738,7 @@ class AssetTypeCollection(dict):
     def load(self):
         self.clear()
         try:
-            dirs = next(os.walk(self._parent.path))[1]
+            dirs = LibraryIndex.walk(self._parent.path)[1]
             for aType in ASSET_TYPE:
                 if aType not in dirs:
                     continue
@@ -474,6 +762,55 @@ class AssetTypeCollection(dict):
         except:
             print(f"{self._parent.path}:\n\tAn error undefined has occurred")
 
+    @staticmethod
+    def _is_in_tree(category):
+        while not isinstance(category, AssetType):
+            parent = category.parent
+            if parent.categories.get(category.path) is not category:
+                return False
+            category = parent
+        return True
+
+    def refresh(self):
+        """
+        Synchronise the asset types and their categories with the folders
+        """
+        try:
+            dirs = LibraryIndex.walk(self._parent.path)[1]
+        except OSError as e:
+            print(f"{self._parent.path}:\n\t{e}")
+            return
+
+        for type_id in [type_id for type_id in self.keys() if type_id not in
+                        dirs]:
+            for category in self[type_id].categories.values():
+                LibrariesManager._clear_preview_collections(category)
+            SearchIndex.discard_tree(self[type_id].path)
+            PathIndex.unregister_tree(self[type_id].path)
+            del self[type_id]
+
+        for type_id in ASSET_TYPE:
+            if type_id not in dirs:
+                continue
+            aType = self.get(type_id)
+            if aType is None:
+                aType = self._new(type_id)
+                aType.categories.load()
+                aType.categories.active = aType
+                continue
+
+            aType.categories.refresh()
+            active_category = aType.active_category
+            if active_category is None or \
+                    not self._is_in_tree(active_category):
+                categories = aType.categories
+                categories.active = categories.get(categories.sorted[0]) if \
+                    categories else aType
+
+        if self.keys() and (self.active is None or
+                            not self.get(self.active.name)):
+            self.active = self.sorted_types[0]
+
     def update(self):
         existing_types = os.listdir(self._parent.path)
         for type_ in existing_types:
@@ -491,6 +828,8 @@ class AssetTypeCollection(dict):
 
     def clear_types(self):
         for aType in self.values():
+            SearchIndex.discard_tree(aType.path)
+            PathIndex.unregister_tree(aType.path)
             del aType
 
         self.clear()
@@ -507,11 +846,14 @@ class CategoryCollection(CategoriesCore):
         self._parent.active_category = category
 
     def load(self):
+        for category in self.values():
+            SearchIndex.discard_tree(category.path)
+            PathIndex.unregister_tree(category.path)
         self.clear()
 
-        categories = next(os.walk(self._parent.path))[1]
+        categories = LibraryIndex.walk(self._parent.path)[1]
         for category in categories:
-            self.add(category)
+            self._load(category)
 
     @staticmethod
     def rename(category, new_name):
@@ -602,43 +944,26 @@ class AmLibrariesManager:
             aType.categories.active = category
 
     def get_library_from_path(self, path):
-        library = [library for library in self.libraries.values() if
-                   path.startswith(f"{library.path}{os.sep}")]
-
-        return library[0] if library else None
+        return PathIndex.find(os.path.dirname(path), Library)
 
     def get_asset_type_from_path(self, path, library=None):
-        if library is None:
-            library = self.get_library_from_path(path)
-
-        if library is not None:
-            a_type = Path(path.split(library.path)[-1]).parts[1]
-            return library.asset_types.get(a_type)
-
-        return
+        aType = PathIndex.find(path, AssetType)
+        if library is not None and aType is not None and \
+                aType.parent is not library:
+            return
+        return aType
 
-    def get_category_from_path(self, path, aType=None):
-        if path in [f"{type_}_filtered_preview" for type_ in
-                    ASSET_TYPE.keys()]:
+    def get_category_from_path(self, path):
+        """
+        Return the category of the path or of its closest parent folder
+        @param path: String, path of the category
+        @return: Object, Category or AssetType
+        """
+        if path.endswith("_filtered_preview") and path in [
+                f"{type_}_filtered_preview" for type_ in ASSET_TYPE.keys()]:
             return self.active_type
-        if aType is None:
-            aType = self.get_asset_type_from_path(path)
-        if aType.path == path:
-            return aType
-
-        if aType is not None:
-            categories = path.split(aType.path + os.sep)[-1].split(os.sep)
-            category = aType
-            for category_name in categories:
-                path = os.path.join(category.path, category_name)
-                tmp_category = category.categories.get(path)
-                if tmp_category is None:
-                    break
-                category = tmp_category
 
-            return category
-
-        return
+        return PathIndex.find(path, (Category, AssetType))
 
     def get_asset_from_path(self, path, category=None):
         """
@@ -647,15 +972,22 @@ class AmLibrariesManager:
         @param path: String, the path of the asset
         @return: Object
         """
-        if category is None:
-            cat_path = os.path.dirname(path)
-            category = self.get_category_from_path(cat_path)
+        asset = PathIndex.get(path)
+        if asset is None:
+            if category is None:
+                category = self.get_category_from_path(os.path.dirname(path))
+            if category is None or not hasattr(category, 'is_loaded') or \
+                    category.is_loaded:
+                return
+            # the assets are registered when the category is loaded
+            category.assets
+            asset = PathIndex.get(path)
 
-        if category is not None:
-            asset = [asset for asset in category.assets if asset.path == path]
-            return asset[0] if asset else None
+        if not isinstance(asset, AmAsset) or (
+                category is not None and asset.parent is not category):
+            return
 
-        return
+        return asset
 
 
     def pinned_categories(self, category=None, pinned=None):
@@ -683,8 +1015,9 @@ class AmLibrariesManager:
         if category.categories:
             for path, sub_category in category.categories.items():
                 if sub_category.pinned or \
-                        (sub_category.active_asset is not None and
-                        sub_category.assets.active_index):
+                        (sub_category.is_loaded and
+                         sub_category.active_asset is not None and
+                         sub_category.assets.active_index):
                     datas[path] = {
                         'pinned': sub_category.pinned,
                         'asset_index': sub_category.assets.active_index}
@@ -774,8 +1107,11 @@ class AmLibrariesManager:
         dst_asset_dir, dst_icon_dir = AmPath.get_export_dirs(
                 to_category.path, asset.from_root)
 
+        StatCache.invalidate(asset.dir_path)
         shutil.move(asset.path, os.path.join(dst_asset_dir, filename))
+        AmCatalog.move(asset.path, os.path.join(dst_asset_dir, filename))
         shutil.move(asset.icon_path, os.path.join(dst_icon_dir, icon_filename))
+        asset.parent.assets.discard_icon(asset)
         if asset.TEX_path is not None:
             TEX_folder = f"TEX_{asset.name}"
             shutil.move(asset.TEX_path, os.path.join(dst_asset_dir,
@@ -828,9 +1164,15 @@ class AmLibrariesManager:
 
             AmJson.save_as_json_file(AM_UI_SETTINGS, datas)
 
+        LibraryIndex.save(self.libraries.keys())
+        BlendReader.save(self.libraries.keys())
+
     def load_settings(self):
         datas = AmJson.load_json_file(AM_UI_SETTINGS)
         if datas is not None:
+            if datas.get('active_library'):
+                self.active_library = datas['active_library']
+
             for lib_path, am_library in self.libraries.items():
                 library = datas.get(lib_path)
 
@@ -854,7 +1196,7 @@ class AmLibrariesManager:
                     # setup the active category
                     if data_type.get('active_category'):
                         active_category = self.get_category_from_path(
-                                data_type['active_category'], aType)
+                                data_type['active_category'])
                         if active_category is not None:
                             aType.active_category = active_category
                             self.expand_hierarchy_visibility(active_category)
@@ -863,7 +1205,7 @@ class AmLibrariesManager:
                     for path, values in data_categories.items():
                         if not os.path.exists(path):
                             continue
-                        amCategory = self.get_category_from_path(path, aType)
+                        amCategory = self.get_category_from_path(path)
                         amCategory.pinned = values['pinned']
                         # min function because an asset may have been
                         # deleted manually which could make the saved index
@@ -872,9 +1214,37 @@ class AmLibrariesManager:
                             min(values['asset_index'],
                                 len(amCategory.assets)-1)]
 
+    def _sync_category_previews(self, am_previews, category):
+        if category.pinned and not am_previews.get(category.path):
+            preview = am_previews.add()
+            preview.name = category.path
+        for cat in category.categories.values():
+            self._sync_category_previews(am_previews, cat)
+
+    def sync_previews(self):
+        """
+        Create the missing previews of the active and pinned categories.
+        The previews are stored in the window manager which may have been
+        replaced by the one of the opened blendfile.
+        """
+        am_previews = bpy.context.window_manager.asset_management.previews
+        for library in self.libraries.values():
+            for aType in library.asset_types.values():
+                active_category = aType.active_category
+                if active_category is None:
+                    continue
+                if active_category == aType:
+                    aType.preview
+                elif not am_previews.get(active_category.path):
+                    preview = am_previews.add()
+                    preview.name = active_category.path
+
+                for category in aType.categories.values():
+                    self._sync_category_previews(am_previews, category)
+
     def _clear_preview_collections(self, category):
-        if category.assets.pcoll is not None:
-            previews.remove(category.assets.pcoll)
+        if category.is_loaded:
+            category.assets.remove_previews()
         if category.categories:
             for cat in category.categories.values():
                 self._clear_preview_collections(cat)
@@ -887,3 +1257,160 @@ class AmLibrariesManager:
 
 
 LibrariesManager = AmLibrariesManager()
+
+
+class AmLibrariesLoader:
+    """
+    Load the libraries without blocking the startup of Blender. The folders
+    are read by a thread and the libraries are created one by one from a
+    timer, the active library first, so the panels can be drawn before all
+    the libraries are loaded.
+    """
+
+    def __init__(self):
+        self._thread = None
+        self._queue = None
+        self._cancelled = None
+        self._active = None
+        self._total = 0
+        self._loaded = 0
+        # bpy.app.timers identifies the timers by the function object, the
+        # bound method is created once
+        self._timer = self._timer
+
+    @property
+    def loading(self):
+        return bpy.app.timers.is_registered(self._timer)
+
+    @property
+    def progress(self):
+        """
+        :return: Tuple, (loaded libraries, libraries to load)
+        """
+        return self._loaded, self._total
+
+    def start(self):
+        self.cancel()
+
+        libraries = LibrariesManager.libraries
+        paths = AmPath.sort_path_by_name(libraries.begin_load())
+        if not paths:
+            libraries.end_load()
+            return
+
+        # the folders and the json files of the libraries are modified by
+        # the upgrade, it is done before the thread reads them
+        libraries._upgrade_libraries(paths)
+
+        # the active library of the previous session is loaded first
+        self._active = self._get_saved_active()
+        if self._active in paths:
+            paths.remove(self._active)
+            paths.insert(0, self._active)
+
+        prefs = addon_prefs().libraries
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+        self._total = len(paths)
+        self._loaded = 0
+        self._thread = threading.Thread(target=self._scan,
+                                        args=(paths,
+                                              prefs.scan_workers,
+                                              not prefs.lazy_loading,
+                                              self._queue,
+                                              self._cancelled),
+                                        daemon=True)
+        self._thread.start()
+        bpy.app.timers.register(self._timer, first_interval=0.1,
+                                persistent=True)
+
+    def cancel(self):
+        """
+        Stop publishing the libraries, the thread ends after the library
+        being read
+        """
+        if bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.unregister(self._timer)
+        if self._cancelled is not None:
+            self._cancelled.set()
+        self._thread = None
+        LibraryIndex.clear_prefetched()
+
+    @staticmethod
+    def _get_saved_active():
+        """
+        :return: String, path of the active library saved in the ui
+        settings, None if there is none
+        """
+        if not os.path.exists(AM_UI_SETTINGS):
+            return None
+        datas = AmJson.load_json_file(AM_UI_SETTINGS)
+        if not isinstance(datas, dict):
+            return None
+        return datas.get('active_library')
+
+    @staticmethod
+    def _scan(paths, workers, include_assets, results, cancelled):
+        """
+        Read the folders of the libraries, run by the thread. The disk is
+        only read here, the libraries are created by the timer.
+        """
+        scanner = AmLibraryScanner(LibraryIndex, workers)
+        for path in paths:
+            if cancelled.is_set():
+                return
+            tree = {}
+            if os.path.exists(path) and not LibraryIndex.load_manifest(path):
+                tree = scanner.scan([path], include_assets=include_assets)
+            results.put((path, tree))
+
+    def _finish(self):
+        self._thread = None
+        LibrariesManager.libraries.end_load()
+        LibrariesManager.load_settings()
+
+    def _load(self, path, tree):
+        libraries = LibrariesManager.libraries
+        try:
+            LibraryIndex.prefetch(tree)
+            library = libraries.load_library(path)
+        except Exception as e:
+            print(f"{path}: The library can't be loaded\n\t{e!r}")
+            return
+        finally:
+            LibraryIndex.clear_prefetched()
+
+        # the panels are drawn with the saved active library as soon as it
+        # is loaded, the first library is activated by end_load otherwise
+        if library is not None and path == self._active:
+            libraries.active = path
+
+    def _timer(self):
+        # the timer is dropped by Blender if it raises, the loading is
+        # finished whatever happens to a library
+        finished = True
+        try:
+            try:
+                path, tree = self._queue.get_nowait()
+            except queue.Empty:
+                if self._thread is not None and self._thread.is_alive():
+                    finished = False
+                    return 0.1
+                # the thread has been interrupted by an error
+                return None
+
+            self._load(path, tree)
+            self._loaded += 1
+            finished = self._loaded >= self._total
+        finally:
+            if finished:
+                self._finish()
+
+        for window in bpy.context.window_manager.windows:
+            for area in window.screen.areas:
+                area.tag_redraw()
+
+        return None if finished else 0.0
+
+
+LibrariesLoader = AmLibrariesLoader()
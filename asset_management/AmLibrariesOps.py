@@ -29,6 +29,7 @@ from bpy.props import (StringProperty,
                        BoolProperty)
 
 from .AmLibraries import LibrariesManager as LM
+from .AmIndex import LibraryIndex
 from .AmUtils import AmJson, AmPath, AmName, wrap_text
 from .ressources.constants import (ORDERED_TYPES,
                                    WARNING_REMOVE_MESSAGE,
@@ -360,6 +361,46 @@ class ASSETM_OT_rename_library(Operator, OperatorsStatus):
         return {'RUNNING_MODAL'}
 
 
+class ASSETM_OT_toggle_remote_library(Operator):
+    """Cache the content of the folders of the active library for a few
+    seconds. Use it for the libraries stored on a network share"""
+    bl_idname = 'asset_management.toggle_remote_library'
+    bl_label = "Network library"
+
+    @classmethod
+    def poll(cls, context):
+        return LM.active_library is not None
+
+    def execute(self, context):
+        library = LM.active_library
+        LM.libraries.set_remote(library.path, not library.remote)
+        return {'FINISHED'}
+
+
+class ASSETM_OT_build_library_manifest(Operator):
+    """Save the content of the active library in a manifest. The sessions
+    which load the library read the manifest instead of scanning all its
+    folders. Build it again after modifying the library"""
+    bl_idname = 'asset_management.build_library_manifest'
+    bl_label = "Build library manifest"
+
+    @classmethod
+    def poll(cls, context):
+        return LM.active_library is not None
+
+    def execute(self, context):
+        path = LM.active_library.path
+        try:
+            count = LibraryIndex.save_manifest(path)
+        except OSError as e:
+            self.report({'WARNING'}, f"{self.__class__.__name__} - "
+                                     f"The manifest can't be saved: {e}")
+            return {'CANCELLED'}
+
+        self.report({'INFO'}, f"Manifest saved with {count} folders")
+        return {'FINISHED'}
+
+
 class ASSETM_OT_move_library(Operator, OperatorsStatus):
     """Move the active library in targeted location"""
     bl_idname = 'asset_management.move_library'
@@ -751,6 +792,8 @@ CLASSES = (ASSETM_OT_browser_directory,
            ASSETM_OT_add_library,
            ASSETM_OT_remove_library,
            ASSETM_OT_rename_library,
+           ASSETM_OT_toggle_remote_library,
+           ASSETM_OT_build_library_manifest,
            ASSETM_OT_move_library,
            ASSETM_OT_add_asset_type,
            ASSETM_OT_expand_category,
@@ -0,0 +1,635 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import os
+import re
+import threading
+
+from bisect import bisect_left
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+from .AmBlend import BlendReader, AmBlendError
+
+
+# Weights of the matches: the names rank above the catalog tags and the
+# datablocks contained in the files, the exact words above the prefixes and
+# the prefixes above the misspelled words
+NAME_WEIGHT = 1.0
+
+TAG_WEIGHT = 0.8
+
+CONTENT_WEIGHT = 0.7
+
+FUZZY_WEIGHT = 0.6
+
+# Minimum similarity between the trigrams of a misspelled word and a word
+# of the names to compare them, "chiar" and "chair" share 2 trigrams out
+# of 6 and have a similarity of 0.33
+TRIGRAM_THRESHOLD = 0.25
+
+# Minimum ratio of matching characters of the compared words, "chiar" and
+# "chair" have a ratio of 0.8, "chiar" and "chain" of 0.6
+FUZZY_THRESHOLD = 0.7
+
+DATABLOCK_LABELS = {'collections': "Collection",
+                    'objects': "Object",
+                    'materials': "Material",
+                    'node_groups': "Node group",
+                    'worlds': "World"
+                    }
+
+_WORDS = re.compile(r"[^\W_]+")
+
+# Parts of the camel case words and the numbers: "WoodPlank02" gives
+# "Wood", "Plank" and "02"
+_PARTS = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+|[^\W\d_]+")
+
+
+def tokenize(name):
+    """
+    Split a name in lower case tokens, the camel case words are split too
+    but also kept whole so that "woodpl" finds "WoodPlank"
+    @param name: String
+    @return: Set
+    """
+    tokens = set()
+    for word in _WORDS.findall(name):
+        tokens.add(word.lower())
+        for part in _PARTS.findall(word):
+            tokens.add(part.lower())
+    return tokens
+
+
+def tokenize_query(text):
+    """
+    @param text: String, searched text
+    @return: List, lower case tokens of the text
+    """
+    return [word.lower() for word in _WORDS.findall(text)]
+
+
+def trigrams(token):
+    """
+    @param token: String
+    @return: Set, trigrams of the token padded with spaces, the start of
+    the words weighs more than their end
+    """
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class _AmIndexedAsset:
+
+    __slots__ = ('tokens', 'tags', 'contents', 'origins')
+
+    def __init__(self, tokens, tags, contents, origins):
+        self.tokens = tokens
+        self.tags = tags
+        # {datablock type: [names]}
+        self.contents = contents
+        # {token: (datablock type, datablock name)}, the tokens only found
+        # in the datablocks
+        self.origins = origins
+
+
+class _AmTokenIndex:
+    """
+    Inverted index of the asset names, of their catalog tags and of the
+    names of the datablocks of their files for an asset type. The tokens
+    are sorted the first time they are searched after a modification, the
+    tokens starting with the searched words are then found by bisection.
+    The misspelled words are found by the trigrams they share with the
+    tokens.
+    """
+
+    def __init__(self):
+        # {token: {asset: weight}}
+        self.postings = {}
+        self._tokens = None
+        # {trigram: set(tokens)}, the numbers are only found by prefix
+        self._trigrams = {}
+        # {asset: _AmIndexedAsset}, the name of an asset may have changed
+        # when it is discarded
+        self.assets = {}
+
+    def _add_token(self, token, asset, weight):
+        posting = self.postings.get(token)
+        if posting is None:
+            posting = self.postings[token] = {}
+            self._tokens = None
+            if not token.isdigit():
+                for trigram in trigrams(token):
+                    self._trigrams.setdefault(trigram, set()).add(token)
+        if posting.get(asset, 0) < weight:
+            posting[asset] = weight
+
+    def _remove_token(self, token, asset):
+        posting = self.postings[token]
+        posting.pop(asset, None)
+        if posting:
+            return
+        del self.postings[token]
+        self._tokens = None
+        if not token.isdigit():
+            for trigram in trigrams(token):
+                tokens = self._trigrams[trigram]
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+
+    def add(self, asset, tags=(), contents=None):
+        if asset in self.assets:
+            return False
+        name_tokens = tokenize(asset.name)
+        tag_tokens = set()
+        for tag in tags:
+            tag_tokens.update(tokenize(tag))
+        origins = {}
+        for data_type, names in (contents or {}).items():
+            for name in names:
+                for token in tokenize(name):
+                    if token not in name_tokens and token not in tag_tokens:
+                        origins.setdefault(token, (data_type, name))
+
+        self.assets[asset] = _AmIndexedAsset(
+                name_tokens | tag_tokens | set(origins), tuple(tags),
+                contents, origins)
+        for token in origins:
+            self._add_token(token, asset, CONTENT_WEIGHT)
+        for token in tag_tokens:
+            self._add_token(token, asset, TAG_WEIGHT)
+        for token in name_tokens:
+            self._add_token(token, asset, NAME_WEIGHT)
+        return True
+
+    def discard(self, asset):
+        entry = self.assets.pop(asset, None)
+        if entry is None:
+            return False
+        for token in entry.tokens:
+            self._remove_token(token, asset)
+        return True
+
+    def match(self, word):
+        """
+        Return the tokens starting with the word and the tokens close to
+        the word if it is misspelled
+        @param word: String, searched word
+        @return: Dict, {token: score}
+        """
+        if self._tokens is None:
+            self._tokens = sorted(self.postings)
+        tokens = self._tokens
+        start = bisect_left(tokens, word)
+        end = bisect_left(tokens, f"{word}\uffff", start)
+        matches = {token: 0.75 + 0.25 * len(word) / len(token) for token in
+                   tokens[start:end]}
+
+        if len(word) < 3 or word.isdigit():
+            return matches
+
+        common = {}
+        for trigram in trigrams(word):
+            for token in self._trigrams.get(trigram, ()):
+                common[token] = common.get(token, 0) + 1
+
+        # the trigrams find the candidates, their characters rank them
+        matcher = SequenceMatcher(None, autojunk=False)
+        matcher.set_seq2(word)
+        for token, count in common.items():
+            if token in matches:
+                continue
+            # a padded word of n characters has n + 1 trigrams
+            if 2 * count / (len(word) + len(token) + 2) < TRIGRAM_THRESHOLD:
+                continue
+            matcher.set_seq1(token)
+            if matcher.quick_ratio() < FUZZY_THRESHOLD:
+                continue
+            ratio = matcher.ratio()
+            if ratio >= FUZZY_THRESHOLD:
+                matches[token] = FUZZY_WEIGHT * ratio
+
+        return matches
+
+    def score(self, words):
+        """
+        Return the assets matching all the words with their mean score
+        @param words: List, searched words
+        @return: Dict, {asset: (score, (datablock type, datablock name))},
+        the datablock is None if the words are found in the name or in the
+        tags of the asset
+        """
+        word_matches = [self.match(word) for word in words]
+        # the words matching the fewest assets are processed first, the
+        # next words are only checked against the remaining assets
+        word_matches.sort(key=lambda matches: sum(
+                len(self.postings[token]) for token in matches))
+
+        # {asset: (total score, best token of each word)}
+        scores = {}
+        for token, score in word_matches[0].items():
+            for asset, weight in self.postings[token].items():
+                if asset not in scores or scores[asset][0] < score * weight:
+                    scores[asset] = (score * weight, (token,))
+
+        for matches in word_matches[1:]:
+            if not scores:
+                break
+            next_scores = {}
+            for asset, (total, tokens) in scores.items():
+                best = 0
+                best_token = None
+                for token in self.assets[asset].tokens:
+                    score = matches.get(token)
+                    if score is not None and \
+                            score * self.postings[token][asset] > best:
+                        best = score * self.postings[token][asset]
+                        best_token = token
+                if best_token is not None:
+                    next_scores[asset] = (total + best,
+                                          tokens + (best_token,))
+            scores = next_scores
+
+        results = {}
+        for asset, (total, tokens) in scores.items():
+            origins = self.assets[asset].origins
+            origin = None
+            for token in tokens:
+                if token in origins:
+                    origin = origins[token]
+                    break
+            results[asset] = (total / len(words), origin)
+        return results
+
+
+class AmSearchIndex:
+    """
+    Index of the names and of the catalog tags of the assets by asset
+    type, shared by all the libraries. The assets are indexed when they
+    are added to their category and removed when they are removed from
+    it, so searching the names doesn't walk the libraries. The assets of
+    the categories which are not loaded are indexed as entries until
+    their category is loaded.
+    The assets of a removed library, asset type or category tree are
+    discarded together by discard_tree. The searches also skip and
+    discard the assets which are no longer registered.
+    The index is modified from the main thread and searched from the
+    search threads, both are done under a lock.
+    """
+
+    def __init__(self):
+        # {asset type: _AmTokenIndex}
+        self._indexes = {}
+        # asset types having categories whose assets or catalog are not
+        # loaded yet
+        self._incomplete = set()
+        # incremented each time the indexed assets are modified
+        self.generation = 0
+        # {asset type: generation}, the modifications of each asset type
+        self._generations = {}
+        # {asset type: generation}, only incremented when assets are added
+        # or discarded, not when their tags or datablocks are indexed again
+        self._assets_generations = {}
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _get_type(asset):
+        return asset.parent_asset_type.name
+
+    def _modified(self, type_id, reindexed=False):
+        self.generation += 1
+        self._generations[type_id] = self._generations.get(type_id, 0) + 1
+        if not reindexed:
+            self._assets_generations[type_id] = \
+                self._assets_generations.get(type_id, 0) + 1
+
+    def get_generation(self, type_id):
+        """
+        @param type_id: String, name of the asset type
+        @return: Int, incremented each time the indexed assets of the asset
+        type are modified
+        """
+        return self._generations.get(type_id, 0)
+
+    def get_assets_generation(self, type_id):
+        """
+        @param type_id: String, name of the asset type
+        @return: Int, incremented each time assets of the asset type are
+        added or discarded
+        """
+        return self._assets_generations.get(type_id, 0)
+
+    def add(self, asset, tags=()):
+        """
+        @param asset: Asset instance
+        @param tags: Iterable, tags of the asset saved in the catalog
+        """
+        type_id = self._get_type(asset)
+        with self._lock:
+            index = self._indexes.get(type_id)
+            if index is None:
+                index = self._indexes[type_id] = _AmTokenIndex()
+            if index.add(asset, tags):
+                self._modified(type_id)
+
+    def _reindex(self, asset, tags=None, contents=None):
+        """
+        Index the asset again if its tags or its datablocks have been
+        modified, nothing is done if the asset is no longer indexed
+        """
+        type_id = self._get_type(asset)
+        with self._lock:
+            index = self._indexes.get(type_id)
+            entry = index.assets.get(asset) if index is not None else None
+            if entry is None:
+                return
+            if tags is None:
+                tags = entry.tags
+            if contents is None:
+                contents = entry.contents
+            if tags == entry.tags and contents == entry.contents:
+                return
+            index.discard(asset)
+            index.add(asset, tags, contents)
+            self._modified(type_id, reindexed=True)
+
+    def set_tags(self, asset, tags):
+        """
+        @param asset: Asset instance
+        @param tags: Iterable, tags of the asset saved in the catalog
+        """
+        self._reindex(asset, tags=tuple(tags))
+
+    def set_contents(self, asset, contents):
+        """
+        @param asset: Asset instance
+        @param contents: Dict, {datablock type: [names]} of the asset file
+        """
+        self._reindex(asset, contents=contents)
+
+    def get_types(self):
+        """
+        @return: List, names of the asset types having indexed assets
+        """
+        with self._lock:
+            return [type_id for type_id, index in self._indexes.items() if
+                    index.assets]
+
+    def get_assets(self, type_id):
+        """
+        @param type_id: String, name of the asset type
+        @return: List, indexed assets of the asset type
+        """
+        with self._lock:
+            index = self._indexes.get(type_id)
+            return list(index.assets) if index is not None else []
+
+    def discard(self, asset):
+        type_id = self._get_type(asset)
+        with self._lock:
+            index = self._indexes.get(type_id)
+            if index is not None and index.discard(asset):
+                self._modified(type_id)
+
+    def discard_tree(self, path):
+        """
+        Discard the assets of a library, asset type or category removed
+        with all its content, the generations of their asset types are
+        incremented so the cached searches are not used anymore
+        @param path: String, path of the removed folder
+        """
+        prefix = f"{path}{os.sep}"
+        with self._lock:
+            for type_id, index in self._indexes.items():
+                removed = [asset for asset in index.assets if
+                           asset.path.startswith(prefix)]
+                for asset in removed:
+                    index.discard(asset)
+                if removed:
+                    self._modified(type_id)
+
+    def clear(self):
+        with self._lock:
+            for type_id in set(self._indexes) | set(self._generations):
+                self._modified(type_id)
+            self._indexes.clear()
+            self._incomplete.clear()
+
+    def mark_incomplete(self, type_id):
+        """
+        Called when a category is created without loading its assets or
+        when the catalog of a category has to be read again
+        @param type_id: String, name of the asset type
+        """
+        self._incomplete.add(type_id)
+
+    def mark_complete(self, type_id):
+        self._incomplete.discard(type_id)
+
+    def is_complete(self, type_id):
+        return type_id not in self._incomplete
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(index.assets) for index in
+                       self._indexes.values())
+
+    def search(self, type_id, tags):
+        """
+        Return the assets of the asset type matching one of the tags with
+        their score. An asset matches a tag when each word of the tag
+        starts one of the words of its name, of its catalog tags or of the
+        datablocks of its file, or is close to one of them if it is
+        misspelled.
+        @param type_id: String, name of the asset type
+        @param tags: List, searched texts
+        @return: Dict, {asset: (score between 0 and 1, match)}, the match
+        describes the datablock found, "Object Bolt_M8", None if the asset
+        is found by its name or its tags
+        """
+        with self._lock:
+            index = self._indexes.get(type_id)
+            if index is None:
+                return {}
+
+            found = {}
+            for tag in tags:
+                words = tokenize_query(tag)
+                if not words:
+                    continue
+                for asset, (score, origin) in index.score(words).items():
+                    if asset in found and found[asset][0] >= score:
+                        continue
+                    match = None
+                    if origin is not None:
+                        data_type, name = origin
+                        label = DATABLOCK_LABELS.get(data_type, data_type)
+                        match = f"{label} {name}"
+                    found[asset] = (score, match)
+
+            removed = [asset for asset in found if
+                       not asset.is_registered]
+            for asset in removed:
+                del found[asset]
+                if index.discard(asset):
+                    self._modified(type_id)
+
+            return found
+
+
+class AmContentIndexer:
+    """
+    Index the names of the datablocks contained in the .blend assets, so
+    an asset is found by its objects, materials or node groups. The files
+    are read by a thread, only their block headers are read, and the
+    BlendReader keeps their datablocks until the files are modified. An
+    asset queued again is only read again if its file has changed.
+    """
+
+    def __init__(self):
+        # the assets to read, in their queuing order
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self.enabled = True
+
+    @property
+    def pending(self):
+        return len(self._pending)
+
+    def queue(self, assets):
+        """
+        @param assets: Iterable, assets whose file has been added or may
+        have been modified
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            for asset in assets:
+                if asset.filename.lower().endswith('.blend'):
+                    self._pending[asset] = None
+            if self._pending and self._thread is None:
+                self._thread = threading.Thread(target=self._run,
+                                                daemon=True)
+                self._thread.start()
+
+    def cancel(self):
+        with self._lock:
+            self._pending.clear()
+
+    def _run(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pending:
+                        self._thread = None
+                        break
+                    asset = next(iter(self._pending))
+                    del self._pending[asset]
+
+                try:
+                    datablocks = BlendReader.datablocks(asset.path)
+                    SearchIndex.set_contents(asset, datablocks)
+                except FileNotFoundError:
+                    # removed since it has been queued
+                    continue
+                except (OSError, AmBlendError) as e:
+                    print(f"{asset.path}: The datablocks can't be read"
+                          f"\n\t{e}")
+                    continue
+                except Exception as e:
+                    # an unexpected error on a file must not stop the
+                    # indexing of the others
+                    print(f"{asset.path}: The datablocks can't be read"
+                          f"\n\t{type(e).__name__}: {e}")
+                    continue
+
+            BlendReader.save()
+        finally:
+            # a thread stopped by an error is started again by queue
+            with self._lock:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+
+class AmSearchCache:
+    """
+    Last results of the searches of each asset type. A search repeated
+    while the indexed assets of its asset type haven't been modified
+    returns its ranked results at once instead of searching again.
+    """
+
+    def __init__(self, size=16):
+        # number of searches kept by asset type
+        self.size = size
+        # {asset type: OrderedDict({query: (generation, results)})}
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _get_query(tags):
+        # the searches only depend on the words of the tags
+        return tuple(" ".join(tokenize_query(tag)) for tag in tags)
+
+    def get(self, type_id, tags):
+        """
+        @param type_id: String, name of the asset type
+        @param tags: List, searched texts
+        @return: Object, results of the search, None if they are unknown or
+        outdated
+        """
+        query = self._get_query(tags)
+        with self._lock:
+            entries = self._entries.get(type_id)
+            entry = entries.get(query) if entries is not None else None
+            if entry is None:
+                return None
+            if entry[0] != SearchIndex.get_generation(type_id):
+                del entries[query]
+                return None
+            entries.move_to_end(query)
+            return entry[1]
+
+    def put(self, type_id, tags, generation, results):
+        """
+        @param generation: Int, generation of the asset type read before
+        searching
+        @param results: Object, results of the search, must not be modified
+        """
+        query = self._get_query(tags)
+        with self._lock:
+            entries = self._entries.setdefault(type_id, OrderedDict())
+            entries[query] = (generation, results)
+            entries.move_to_end(query)
+            while len(entries) > self.size:
+                entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+SearchIndex = AmSearchIndex()
+
+SearchCache = AmSearchCache()
+
+ContentIndexer = AmContentIndexer()
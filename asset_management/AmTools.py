@@ -21,6 +21,7 @@
 import bpy
 import os
 import time
+import tempfile
 
 from bpy.types import Operator
 from bpy.props import (IntProperty, FloatProperty, StringProperty)
@@ -29,10 +30,12 @@ from bpy.utils import register_class, unregister_class
 from .AmUtils import (AmName, Thumbnailer, AmBackgroundProcessor,
                       addon_prefs, Console)
 from .AmLibraries import LibrariesManager as LM
-from .AmCore import AmEnvironment, AmFilterSearchName
+from .AmCore import AmEnvironment, AmFilterSearchName, AmPages
+from .AmCatalog import AmCatalog
+from .AmIndex import LibraryIndex
 from .AmImportExport import AmExportHelper
 from .t3dn_bip.ops import InstallPillow
-from .ressources.constants import SETUP_EDIT_ASSET_SCENE
+from .ressources.constants import SETUP_EDIT_ASSET_SCENE, CATALOG_BACKFILL
 
 
 class ASSETM_OT_cancel(Operator):
@@ -264,6 +267,9 @@ class ASSETM_OT_change_asset(Operator):
 
     index: IntProperty(default=0)
 
+    # move to the first asset of the next or previous page
+    page: IntProperty(default=0)
+
     category_path: StringProperty(default="")
 
     def execute(self, context):
@@ -287,6 +293,12 @@ class ASSETM_OT_change_asset(Operator):
             data_blocks = category.assets
 
         idx = data_blocks.active_index + self.index
+        page_size = addon_prefs().interface.page_size
+        if self.page and page_size:
+            idx = (data_blocks.active_index // page_size + self.page) * \
+                  page_size
+            if idx < 0:
+                idx = max_index // page_size * page_size
 
         if idx > max_index:
             data_blocks.active = assets[0]
@@ -747,6 +759,81 @@ class ASSETM_OT_update_categories(Operator):
         return {'FINISHED'}
 
 
+class ASSETM_OT_backfill_catalog(Operator):
+    """Save the stats of the assets of the active library which are missing
+    in the catalogs (assets saved with a previous version of the addon or
+    modified outside of the addon)"""
+    bl_idname = "asset_management.backfill_catalog"
+    bl_label = "Fill the assets catalog"
+    bl_options = {'REGISTER'}
+
+    @classmethod
+    def poll(cls, context):
+        return LM.active_library is not None
+
+    @staticmethod
+    def _get_categories(categories):
+        for category in categories.values():
+            yield category
+            yield from ASSETM_OT_backfill_catalog._get_categories(
+                    category.categories)
+
+    @staticmethod
+    def _get_missing_files(category):
+        census = LibraryIndex.census(category.path)
+        catalog = AmCatalog.load(category.path)
+        missing = []
+        for filename, from_root in census.assets:
+            if not filename.endswith(".blend"):
+                continue
+            id_ = filename if from_root else os.path.join("files", filename)
+            stats = catalog.get(id_)
+            stat = census.stats.get(id_)
+            if stats is None or (stat is not None and
+                                 stats.get('mtime') != stat[1]):
+                missing.append(os.path.join(category.path, id_))
+        return missing
+
+    def execute(self, context):
+        categories = []
+        files = []
+        for aType in LM.active_library.asset_types.values():
+            for category in self._get_categories(aType.categories):
+                categories.append(category)
+                files.extend(self._get_missing_files(category))
+
+        if not files:
+            self.report({'INFO'}, "The catalogs are up to date")
+            return {'FINISHED'}
+
+        with tempfile.NamedTemporaryFile('w', suffix=".txt", delete=False,
+                                         encoding="utf-8") as filelist:
+            filelist.write("\n".join(files))
+
+        wm = context.window_manager
+        wm.progress_begin(0, len(files))
+        try:
+            processor = AmBackgroundProcessor()
+            for line in processor.run_process(CATALOG_BACKFILL,
+                                              None,
+                                              True,
+                                              f"package:{__package__}",
+                                              f"filelist:{filelist.name}"):
+                Console.output.append(line)
+                if line.startswith("CATALOG "):
+                    wm.progress_update(int(line[8:].split("/")[0]))
+        finally:
+            wm.progress_end()
+            os.remove(filelist.name)
+
+        for category in categories:
+            if category.is_loaded:
+                category.assets.reload_catalog()
+
+        self.report({'INFO'}, f"{len(files)} assets added to the catalogs")
+        return {'FINISHED'}
+
+
 class ASSETM_OT_search_by_name(Operator):
     """Search for matching assets from the given names"""
     bl_idname = "asset_management.search_by_name"
@@ -762,6 +849,7 @@ class ASSETM_OT_search_by_name(Operator):
         am = context.window_manager.asset_management
         layout = self.layout
         layout.prop(am, 'filter_search', icon='VIEWZOOM')
+        layout.popover(panel='ASSETM_PT_search_facets', icon='FILTER')
 
     def execute(self, context):
         return {'FINISHED'}
@@ -817,6 +905,7 @@ CLASSES = (ASSETM_OT_cancel,
            ASSETM_OT_render_logs,
            ASSETM_OT_update_asset_type,
            ASSETM_OT_update_categories,
+           ASSETM_OT_backfill_catalog,
            ASSETM_OT_search_by_name,
            ASSETM_OT_clear_filter_search)
 
@@ -51,9 +51,9 @@ def addon_prefs():
 class AmJson:
 
     @staticmethod
-    def save_as_json_file(file, data):
+    def save_as_json_file(file, data, indent=4):
         with open(file, 'w', encoding="utf-8") as jsonf:
-            json.dump(data, jsonf, indent=4)
+            json.dump(data, jsonf, indent=indent)
 
     @staticmethod
     def load_json_file(file):
@@ -102,6 +102,17 @@ class AmPath:
                 print(f"\"{path}\" has been completely deleted from your "
                       f"hard drive")
 
+    @staticmethod
+    def get_mtime(path):
+        """
+        Return the modification time of the path in nanoseconds or None if
+        the path doesn't exist
+        """
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
     @staticmethod
     def get_dirs(path):
         if path is None or not os.path.exists(path):
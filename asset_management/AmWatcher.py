@@ -0,0 +1,367 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+import bpy
+import os
+import sys
+import struct
+import ctypes
+import ctypes.util
+
+from .AmUtils import AmPath
+from .AmLibraries import LibrariesManager as LM, LibrariesLoader
+from .AmCore import AmFilterSearchName
+from .ressources.constants import ASSET_TYPE, SUPPORTED_ICONS
+
+
+class AmInotifyBackend:
+    """
+    Watch the folders with inotify. The file descriptor is non blocking so
+    the events are read from the main thread by the timer of the watcher.
+    """
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+
+    _MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | \
+        IN_DELETE | IN_DELETE_SELF | IN_ONLYDIR
+
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"),
+                                 use_errno=True)
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK |
+                                            self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+        self._watches = {}
+        self._paths = {}
+
+    @property
+    def watched(self):
+        return set(self._paths)
+
+    def watch(self, path):
+        if path in self._paths:
+            return True
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path),
+                                          self._MASK)
+        if wd < 0:
+            return False
+        self._watches[wd] = path
+        self._paths[path] = wd
+        return True
+
+    def unwatch(self, path):
+        wd = self._paths.pop(path, None)
+        if wd is not None:
+            self._watches.pop(wd, None)
+            self._libc.inotify_rm_watch(self._fd, wd)
+
+    def read(self):
+        """
+        Return the pending events
+        @return: List, (folder path, file name) or None if some events have
+        been lost
+        """
+        changes = []
+        while True:
+            try:
+                buffer = os.read(self._fd, 65536)
+            except BlockingIOError:
+                return changes
+
+            offset = 0
+            while offset < len(buffer):
+                wd, mask, cookie, length = self._EVENT.unpack_from(buffer,
+                                                                   offset)
+                offset += self._EVENT.size
+                name = buffer[offset:offset + length].rstrip(b"\0")
+                offset += length
+
+                if mask & self.IN_Q_OVERFLOW:
+                    return None
+
+                path = self._watches.get(wd)
+                if path is None:
+                    continue
+
+                if mask & self.IN_IGNORED:
+                    self._watches.pop(wd, None)
+                    self._paths.pop(path, None)
+                    continue
+
+                changes.append((path, os.fsdecode(name)))
+
+    def close(self):
+        os.close(self._fd)
+        self._watches.clear()
+        self._paths.clear()
+
+
+class AmPollingBackend:
+    """
+    Watch the folders by comparing their modification time. Used when
+    inotify is not available or on network shares where the events of the
+    other computers are not received.
+    """
+
+    def __init__(self):
+        self._mtimes = {}
+
+    @property
+    def watched(self):
+        return set(self._mtimes)
+
+    def watch(self, path):
+        if path in self._mtimes:
+            return True
+        mtime = AmPath.get_mtime(path)
+        if mtime is None:
+            return False
+        self._mtimes[path] = mtime
+        return True
+
+    def unwatch(self, path):
+        self._mtimes.pop(path, None)
+
+    def read(self):
+        changes = []
+        for path, mtime in self._mtimes.items():
+            current_mtime = AmPath.get_mtime(path)
+            if current_mtime != mtime:
+                self._mtimes[path] = current_mtime
+                # the modified files are unknown, the folder is listed again
+                changes.append((path, None))
+
+        for path in [path for path, mtime in self._mtimes.items() if
+                     mtime is None]:
+            del self._mtimes[path]
+
+        return changes
+
+    def close(self):
+        self._mtimes.clear()
+
+
+class AmLibrariesWatcher:
+    """
+    Keep the libraries up to date with the changes made by the other
+    artists. The events are processed from a timer so the libraries are
+    only modified from the main thread, the affected categories are
+    refreshed without reloading the libraries.
+    """
+
+    def __init__(self):
+        self._backend = None
+        self._interval = 1.0
+        self._libraries = set()
+        # bpy.app.timers identifies the timers by the function object, the
+        # bound method is created once
+        self._timer = self._timer
+
+    @property
+    def running(self):
+        return self._backend is not None
+
+    def start(self, use_polling=False, interval=1.0):
+        """
+        Start watching the libraries
+        @param use_polling: Bool, compare the folders modification time
+        instead of using inotify
+        @param interval: Float, time in seconds between two checks
+        """
+        self.stop()
+
+        if not use_polling:
+            try:
+                self._backend = AmInotifyBackend()
+            except (OSError, AttributeError) as e:
+                print(f"Asset Management: inotify not available, the "
+                      f"libraries will be polled\n\t{e}")
+
+        if self._backend is None:
+            self._backend = AmPollingBackend()
+
+        self._interval = interval
+        self.sync()
+        bpy.app.timers.register(self._timer, first_interval=interval,
+                                persistent=True)
+
+    def stop(self):
+        if bpy.app.timers.is_registered(self._timer):
+            bpy.app.timers.unregister(self._timer)
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+    def _get_category_paths(self, category, paths):
+        paths.add(category.path)
+        for cat in category.categories.values():
+            self._get_category_paths(cat, paths)
+
+    def sync(self):
+        """
+        Watch the folders of the libraries, asset types and categories
+        currently loaded and stop watching the removed ones
+        """
+        if self._backend is None:
+            return
+
+        self._libraries = set(LM.libraries.keys())
+        paths = set()
+        categories = set()
+        for library in LM.libraries.values():
+            paths.add(library.path)
+            for aType in library.asset_types.values():
+                paths.add(aType.path)
+                for category in aType.categories.values():
+                    self._get_category_paths(category, categories)
+
+        watched = self._backend.watched
+        for path in watched:
+            parent, name = os.path.split(path)
+            if path not in paths and path not in categories and not (
+                    name in ("files", "icons") and parent in categories):
+                self._backend.unwatch(path)
+
+        for path in paths:
+            self._backend.watch(path)
+
+        for path in categories:
+            if path in watched:
+                continue
+            self._backend.watch(path)
+            for dir_ in ("files", "icons"):
+                self._backend.watch(os.path.join(path, dir_))
+
+    def _refresh(self, path, names):
+        """
+        Refresh the object of the library matching the modified folder
+        @param path: String, path of the modified folder
+        @param names: Set, names of the modified files, None if unknown
+        @return: String, id of the modified asset type or None
+        """
+        parent, name = os.path.split(path)
+
+        library = LM.libraries.get(path)
+        if library is not None:
+            library.asset_types.refresh()
+            return None
+
+        library = LM.libraries.get(parent)
+        if library is not None:
+            aType = library.asset_types.get(name)
+            if aType is not None:
+                aType.categories.refresh(recursive=False, force=True)
+            return name
+
+        if name in ("files", "icons"):
+            path = parent
+
+        category = LM.get_category_from_path(path)
+        if category is None or category.path != path or \
+                not hasattr(category, 'assets'):
+            return None
+
+        category.categories.refresh(recursive=False, force=True)
+        if category.is_loaded:
+            category.assets.refresh(force=True)
+            if names is None:
+                category.assets.reload_icons(
+                        asset.name for asset in category.assets)
+            else:
+                category.assets.reload_icons(
+                        os.path.splitext(name)[0] for name in names if
+                        name.lower().endswith(SUPPORTED_ICONS))
+        else:
+            category.refresh_entries(force=True)
+
+        if names is not None:
+            for dir_ in ("files", "icons"):
+                if dir_ in names:
+                    self._backend.watch(os.path.join(category.path, dir_))
+
+        return category.parent_asset_type.name
+
+    @staticmethod
+    def _update_filter(type_id):
+        filter = getattr(AmFilterSearchName, type_id, None)
+        if filter is None or not (filter.tags or filter.facets.is_active):
+            return
+        # the active asset is selected again if it is still found
+        filter.update_assets(LM.libraries.values())
+
+    def _timer(self):
+        if self._backend is None:
+            return None
+
+        if LibrariesLoader.loading:
+            return self._interval
+
+        changes = self._backend.read()
+        if changes is None:
+            # some events have been lost, everything is checked
+            LM.libraries.refresh()
+            changes = []
+            modified = set(ASSET_TYPE)
+        else:
+            modified = set()
+
+        folders = {}
+        for path, name in changes:
+            names = folders.setdefault(path, set())
+            if names is not None:
+                if name is None:
+                    folders[path] = None
+                else:
+                    names.add(name)
+
+        for path in sorted(folders, key=len):
+            modified.add(self._refresh(path, folders[path]))
+
+        modified.discard(None)
+        if folders or modified or self._libraries != set(LM.libraries.keys()):
+            self.sync()
+            for type_id in modified:
+                self._update_filter(type_id)
+            for window in bpy.context.window_manager.windows:
+                for area in window.screen.areas:
+                    area.tag_redraw()
+
+        return self._interval
+
+
+LibrariesWatcher = AmLibrariesWatcher()
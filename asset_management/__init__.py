@@ -70,7 +70,10 @@ from . import (
 
 from .preferences.addon_updater import Updater
 from .AmIcons import Icons
-from .AmLibraries import LibrariesManager as LM
+from .AmLibraries import LibrariesManager as LM, LibrariesLoader
+from .AmWatcher import LibrariesWatcher
+from .AmCore import AmFilterSearchName
+from .AmSearch import ContentIndexer
 from .ressources.constants import AM_PRESET_PATH, AM_DATAS
 from .AmUtils import AddonKeymaps, addon_prefs
 
@@ -89,14 +92,22 @@ def libraries_loader(scene):
     # not,  it means that we have just started Blender and that the register
     # function has done its job. So there is no need to load the libraries
     # from the handler.
-    if LM.libraries.keys() and not LM._initialized:
+    if LibrariesLoader.loading:
+        # The libraries are being loaded, the settings will be restored
+        # once they are all loaded
         LM._initialized = True
+    elif LM.libraries.keys() and not LM._initialized:
+        LM._initialized = True
+        if LM.libraries:
+            LM.libraries.active = LM.libraries.sorted_libraries[0]
+            LM.load_settings()
     else:
-        LM.libraries.load()
-
-    if LM.libraries:
-        LM.libraries.active = LM.libraries.sorted_libraries[0]
-        LM.load_settings()
+        # The libraries are already loaded, only the folders modified
+        # since then are processed so that the loaded previews, the pinned
+        # categories and the active assets are kept.
+        LM.libraries.refresh()
+        LM.sync_previews()
+        LibrariesWatcher.sync()
 
 
 def save_settings():
@@ -120,12 +131,24 @@ def register_handlers():
 
     handlers.load_post.append(libraries_loader)
 
-    if not LM.libraries.keys():
-        LM.libraries.load()
-        LM.load_settings()
+    libraries_prefs = addon_prefs().libraries
+    if not LM.libraries.keys() and not LibrariesLoader.loading:
+        if libraries_prefs.async_loading:
+            LibrariesLoader.start()
+        else:
+            LM.libraries.load()
+            LM.load_settings()
+
+    if libraries_prefs.watch_libraries:
+        LibrariesWatcher.start(use_polling=libraries_prefs.watch_polling,
+                               interval=libraries_prefs.watch_interval)
 
 
 def unregister_handlers():
+    LibrariesLoader.cancel()
+    LibrariesWatcher.stop()
+    AmFilterSearchName.cancel()
+    ContentIndexer.cancel()
     if libraries_loader in handlers.load_post:
         handlers.load_post.remove(libraries_loader)
 
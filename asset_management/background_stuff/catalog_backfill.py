@@ -0,0 +1,53 @@
+# -*- coding:utf-8 -*-
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+
+import bpy
+import os
+import sys
+
+
+for arg in sys.argv:
+    if arg.startswith('package:'):
+        package = arg[8:]
+    if arg.startswith("filelist:"):
+        filelist = arg[9:]
+
+addon_dir = os.path.abspath(__file__.split(package)[0])
+if addon_dir not in sys.path:
+    sys.path.append(addon_dir)
+
+from asset_management.AmCore import AmAssetStats
+
+# The paths are read from a file, the command line is too short for the
+# assets of a whole library
+with open(filelist, 'r', encoding="utf-8") as f:
+    files = [line.rstrip("\n") for line in f if line.strip()]
+
+for i, file in enumerate(files, 1):
+    try:
+        bpy.ops.wm.open_mainfile(filepath=file, load_ui=False)
+        AmAssetStats.save(file)
+    except (RuntimeError, OSError) as e:
+        print(f"ERROR: {file}\n\t{e}")
+        continue
+    print(f"CATALOG {i}/{len(files)}: {file}", flush=True)
+
+bpy.ops.wm.quit_blender()
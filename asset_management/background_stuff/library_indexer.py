@@ -0,0 +1,179 @@
+# -*- coding:utf-8 -*-
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+"""
+Build and check the index and the manifests of the libraries without the
+user interface, for instance on a server during the night:
+
+blender --background --factory-startup --python library_indexer.py --
+    package:PACKAGE COMMAND [--workers N] [--index FILE]
+    LIBRARY [LIBRARY ...]
+
+The modules of the add-on import bpy, the script has to be run by the
+Python of Blender. PACKAGE is the name of the add-on folder, like for the
+other background scripts.
+
+COMMAND:
+    index       read the libraries and save them in the libraries index
+    manifest    save the manifest of the libraries
+    verify      list the folders modified since the index or the manifest
+                has been saved, exit with 1 if some have been found
+    stats       print the content of the libraries
+"""
+
+import os
+import sys
+import time
+import argparse
+import importlib
+
+
+for arg in sys.argv:
+    if arg.startswith('package:'):
+        package = arg[8:]
+
+addon_dir = os.path.abspath(__file__).split(package)[0]
+if addon_dir not in sys.path:
+    sys.path.append(addon_dir)
+
+AmJson = importlib.import_module(f"{package}.AmUtils").AmJson
+AmIndex = importlib.import_module(f"{package}.AmIndex")
+constants = importlib.import_module(f"{package}.ressources.constants")
+
+LibraryIndex = AmIndex.LibraryIndex
+AmLibraryScanner = AmIndex.AmLibraryScanner
+AM_LIBRARIES = constants.AM_LIBRARIES
+AM_LIBRARIES_INDEX = constants.AM_LIBRARIES_INDEX
+ASSET_TYPE = constants.ASSET_TYPE
+RESERVED_FOLDERS = constants.RESERVED_FOLDERS
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    argv = [arg for arg in argv if not arg.startswith('package:')]
+    parser = argparse.ArgumentParser(
+            prog="library_indexer",
+            description="Index the Asset Management libraries")
+    parser.add_argument('command',
+                        choices=('index', 'manifest', 'verify', 'stats'))
+    parser.add_argument('libraries', nargs='+', metavar='LIBRARY')
+    parser.add_argument('--workers', type=int, default=8,
+                        help="Number of threads reading the folders")
+    parser.add_argument('--index', default=AM_LIBRARIES_INDEX,
+                        help="Path of the libraries index")
+    return parser.parse_args(argv)
+
+
+def scan(libraries, workers):
+    start = time.perf_counter()
+    tree = AmLibraryScanner(LibraryIndex, workers).scan(libraries)
+    print(f"{len(tree)} folders read in {time.perf_counter() - start:.2f}s")
+    LibraryIndex.prefetch(tree)
+
+
+def get_categories(path):
+    dirs = LibraryIndex.walk(path)[1]
+    for dir_ in dirs:
+        if dir_ in RESERVED_FOLDERS or dir_.startswith("TEX_"):
+            continue
+        category = os.path.join(path, dir_)
+        yield category
+        yield from get_categories(category)
+
+
+def index(args):
+    LibraryIndex.enabled = True
+    LibraryIndex.load(args.index)
+    scan(args.libraries, args.workers)
+
+    # the libraries of the add-on database are kept in the index
+    roots = set(args.libraries)
+    if args.index == AM_LIBRARIES_INDEX and os.path.exists(AM_LIBRARIES):
+        roots.update(AmJson.load_json_file(AM_LIBRARIES))
+    LibraryIndex.save(roots)
+    print(f"Index saved: {args.index}")
+    return 0
+
+
+def manifest(args):
+    for library in args.libraries:
+        start = time.perf_counter()
+        count = LibraryIndex.save_manifest(library)
+        print(f"{library}: manifest saved with {count} folders in "
+              f"{time.perf_counter() - start:.2f}s")
+    return 0
+
+
+def verify(args):
+    LibraryIndex.enabled = True
+    LibraryIndex.load(args.index)
+    status = 0
+    for library in args.libraries:
+        if not LibraryIndex.load_manifest(library):
+            print(f"{library}: no up to date manifest")
+        outdated = LibraryIndex.get_outdated(library)
+        for path in outdated:
+            print(f"\t{path}")
+        print(f"{library}: {len(outdated)} outdated folders")
+        if outdated:
+            status = 1
+    return status
+
+
+def stats(args):
+    scan(args.libraries, args.workers)
+    for library in args.libraries:
+        asset_types = [dir_ for dir_ in LibraryIndex.walk(library)[1] if
+                       dir_ in ASSET_TYPE]
+        print(library)
+        for asset_type in sorted(asset_types):
+            categories = assets = size = no_icon = textures = 0
+            for category in get_categories(os.path.join(library,
+                                                        asset_type)):
+                census = LibraryIndex.census(category)
+                categories += 1
+                assets += len(census.assets)
+                size += sum(stat[0] for stat in census.stats.values())
+                textures += len(census.textures)
+                icons = {os.path.splitext(icon)[0] for files in
+                         census.icons.values() for icon in files}
+                no_icon += sum(1 for filename, from_root in census.assets if
+                               os.path.splitext(filename)[0] not in icons)
+
+            print(f"\t{asset_type}: {categories} categories, {assets} "
+                  f"assets ({size / 2**20:.1f} MiB), {no_icon} without "
+                  f"icon, {textures} TEX folders")
+    return 0
+
+
+COMMANDS = {'index': index,
+            'manifest': manifest,
+            'verify': verify,
+            'stats': stats
+            }
+
+if __name__ == "__main__":
+    args = parse_args()
+    args.libraries = [os.path.abspath(path) for path in args.libraries]
+    for library in args.libraries:
+        if not os.path.isdir(library):
+            print(f"{library}: not a folder")
+            sys.exit(2)
+    sys.exit(COMMANDS[args.command](args))
@@ -43,7 +43,8 @@ addon_dir = os.path.abspath(__file__.split(package)[0])
 if addon_dir not in sys.path:
     sys.path.append(addon_dir)
 
-from asset_management.AmCore import AmMaterials, ImageProcessing
+from asset_management.AmCore import (AmMaterials, ImageProcessing,
+                                     AmAssetStats)
 
 
 material = bpy.data.materials.get(scn_mat)
@@ -74,6 +75,8 @@ if material is not None:
     if os.path.exists(filepath + "1"):
         os.remove(filepath + "1")
 
+    AmAssetStats.save(filepath)
+
     bpy.ops.wm.quit_blender()
 
 else:
@@ -0,0 +1,101 @@
+# -*- coding:utf-8 -*-
+
+# Blender ASSET MANAGEMENT Add-on
+# Copyright (C) 2018 Legigan Jeremy AKA Pistiwique and Pitiwazou
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+# <pep8 compliant>
+
+
+"""
+Measure with tracemalloc the memory used by the assets of large libraries
+and by their entries in the PathIndex:
+
+blender --background --factory-startup --python memory_benchmark.py --
+    package:PACKAGE [--assets N [N ...]] [--per-category N]
+
+The assets are created in memory, no file is read. Only the path of their
+category is used, so the categories are replaced by a simple object. Half
+of the assets are saved at the root of their category and half in its
+'files' folder.
+Run it before and after a change of AmAsset to compare them, for instance
+on the parent of the commit which slotted the assets.
+"""
+
+import os
+import sys
+import argparse
+import importlib
+import tracemalloc
+
+from types import SimpleNamespace
+
+
+for arg in sys.argv:
+    if arg.startswith('package:'):
+        package = arg[8:]
+
+addon_dir = os.path.abspath(__file__).split(package)[0]
+if addon_dir not in sys.path:
+    sys.path.append(addon_dir)
+
+AmAsset = importlib.import_module(f"{package}.AmCore").AmAsset
+AmPathIndex = importlib.import_module(f"{package}.AmIndex").AmPathIndex
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    argv = [arg for arg in argv if not arg.startswith('package:')]
+    parser = argparse.ArgumentParser(
+            prog="memory_benchmark",
+            description="Measure the memory used by the assets")
+    parser.add_argument('--assets', type=int, nargs='+',
+                        default=[10_000, 100_000, 500_000],
+                        help="Numbers of assets measured")
+    parser.add_argument('--per-category', type=int, default=200,
+                        help="Number of assets of each category")
+    return parser.parse_args(argv)
+
+
+def measure(count, per_category):
+    """
+    @param count: Int, number of assets
+    @param per_category: Int, number of assets of each category
+    @return: Int, bytes allocated for the assets and the PathIndex
+    """
+    categories = [SimpleNamespace(
+            path=os.path.join(os.sep, "library", "assets", f"category_{i}"))
+        for i in range(max(1, count // per_category))]
+    filenames = [f"asset_{i:06d}.blend" for i in range(count)]
+
+    tracemalloc.start()
+    path_index = AmPathIndex()
+    assets = []
+    for i, filename in enumerate(filenames):
+        asset = AmAsset(categories[i // per_category % len(categories)],
+                        filename, i % 2 == 0, (1 << 20, 0))
+        assets.append(asset)
+        path_index.register(asset.path, asset)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for count in args.assets:
+        size = measure(count, args.per_category)
+        print(f"{count:>8} assets: {size / 2**20:8.1f} MiB, "
+              f"{size / count:.0f} bytes per asset")
@@ -35,7 +35,8 @@ addon_dir = os.path.abspath(__file__.split(package)[0])
 if addon_dir not in sys.path:
     sys.path.append(addon_dir)
 
-from asset_management.AmCore import AmImage, ImageProcessing, AmObjects
+from asset_management.AmCore import (AmImage, ImageProcessing, AmObjects,
+                                     AmAssetStats)
 
 
 def object_to_center_of_scene():
@@ -77,4 +78,6 @@ filepath = bpy.data.filepath
 if os.path.exists(filepath + "1"):
     os.remove(filepath + "1")
 
+AmAssetStats.save(filepath)
+
 bpy.ops.wm.quit_blender()
@@ -34,7 +34,7 @@ addon_dir = os.path.abspath(__file__.split(package)[0])
 if addon_dir not in sys.path:
     sys.path.append(addon_dir)
 
-from asset_management.AmCore import AmImage, ImageProcessing
+from asset_management.AmCore import AmImage, ImageProcessing, AmAssetStats
 
 
 filename = os.path.basename(bpy.data.filepath)
@@ -53,4 +53,6 @@ filepath = bpy.data.filepath
 if os.path.exists(filepath + "1"):
     os.remove(filepath + "1")
 
+AmAssetStats.save(filepath)
+
 bpy.ops.wm.quit_blender()
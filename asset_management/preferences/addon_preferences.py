@@ -38,7 +38,9 @@ from .. import bl_info
 from ..AmIcons import Icons
 from ..AmUtils import AddonKeymaps, addon_prefs, wrap_text
 from ..AmLibraries import LibrariesManager as LM
-from..t3dn_bip import previews
+from ..AmIndex import LibraryIndex, StatCache
+from ..AmWatcher import LibrariesWatcher
+from ..AmSearch import ContentIndexer
 
 
 _CREDITS = {
@@ -116,10 +118,8 @@ def check_for_update(self, context):
 
 def _update_icons_loading(self, context):
     def update(category):
-        pcoll = category.assets.pcoll
-        if pcoll is not None:
-            previews.remove(pcoll)
-            category.assets._pcoll = None
+        if category.is_loaded:
+            category.assets.remove_previews()
         for cat in category.categories.values():
             update(cat)
 
@@ -253,6 +253,34 @@ class AssetManagementInterfacePreferences(PropertyGroup, Templates):
             description="Scale the popup icon size"
             )
 
+    page_size: IntProperty(
+            name="Previews per page",
+            default=0,
+            min=0,
+            max=10000,
+            description="Split the categories in pages of previews, only the "
+                        "previews of the displayed page are loaded. 0 "
+                        "displays all the previews"
+            )
+
+    background_search: BoolProperty(
+            name="Search in background",
+            default=True,
+            description="Search the assets in a thread, the results are "
+                        "displayed as they are found"
+            )
+
+    search_delay: FloatProperty(
+            name="Search delay",
+            default=0.2,
+            min=0.0,
+            max=2.0,
+            subtype='TIME',
+            unit='TIME',
+            description="Time in seconds to wait after the last "
+                        "modification of the search filter before searching"
+            )
+
     def draw(self, layout):
         box = self.box_template(layout, self, 'draw_layout', "Interface")
         if self.draw_layout:
@@ -262,6 +290,152 @@ class AssetManagementInterfacePreferences(PropertyGroup, Templates):
             col.prop(self, 'show_labels')
             col.prop(self, 'preview_size')
             col.prop(self, 'popup_icon_size')
+            col.prop(self, 'page_size')
+            col.prop(self, 'background_search')
+            sub = col.column()
+            sub.enabled = self.background_search
+            sub.prop(self, 'search_delay')
+
+
+def _update_library_index(self, context):
+    LibraryIndex.enabled = self.use_index
+
+
+def _update_stat_cache(self, context):
+    StatCache.ttl = self.stat_cache_ttl
+
+
+def _update_content_indexer(self, context):
+    ContentIndexer.enabled = self.search_contents
+    if not self.search_contents:
+        ContentIndexer.cancel()
+
+
+def _update_libraries_watcher(self, context):
+    if self.watch_libraries:
+        LibrariesWatcher.start(use_polling=self.watch_polling,
+                               interval=self.watch_interval)
+    else:
+        LibrariesWatcher.stop()
+
+
+class AssetManagementLibrariesPreferences(PropertyGroup, Templates):
+    draw_layout: BoolProperty(
+            name="Libraries",
+            default=False,
+            description="Display the libraries preferences"
+            )
+
+    use_index: BoolProperty(
+            name="Use libraries index",
+            default=True,
+            description="Save the content of the libraries in an index file "
+                        "next to 'libraries.json' so that only the folders "
+                        "modified since the last session are scanned at "
+                        "startup",
+            update=_update_library_index
+            )
+
+    async_loading: BoolProperty(
+            name="Load in background",
+            default=True,
+            description="Load the libraries in the background at startup so "
+                        "that Blender doesn't wait for them, the active "
+                        "library is loaded first"
+            )
+
+    lazy_loading: BoolProperty(
+            name="Lazy loading",
+            default=True,
+            description="Only load the assets of a category the first time "
+                        "it is displayed or searched instead of loading "
+                        "all the categories at startup"
+            )
+
+    scan_workers: IntProperty(
+            name="Scanning threads",
+            default=8,
+            min=1,
+            max=32,
+            description="Number of threads used to read the libraries "
+                        "folders at startup. Useful for libraries stored on "
+                        "a network share. 1 reads the folders one after the "
+                        "other"
+            )
+
+    stat_cache_ttl: FloatProperty(
+            name="Network cache duration",
+            default=10.0,
+            min=0.0,
+            max=600.0,
+            subtype='TIME',
+            unit='TIME',
+            description="Time in seconds during which the content of the "
+                        "folders of the network libraries is reused instead "
+                        "of being read again on the server",
+            update=_update_stat_cache
+            )
+
+    search_contents: BoolProperty(
+            name="Search the datablocks",
+            default=True,
+            description="Also find the assets by the names of the objects, "
+                        "materials and node groups of their .blend file, the "
+                        "files of the categories opened or found by a search "
+                        "are read in the background",
+            update=_update_content_indexer
+            )
+
+    watch_libraries: BoolProperty(
+            name="Watch libraries",
+            default=False,
+            description="Display the assets added, renamed or removed by "
+                        "other artists without reloading the libraries",
+            update=_update_libraries_watcher
+            )
+
+    watch_polling: BoolProperty(
+            name="Polling",
+            default=False,
+            description="Check the folders modification time instead of "
+                        "using the system notifications. Needed for the "
+                        "libraries stored on a network share or when the "
+                        "notifications are not available (Windows, MacOS)",
+            update=_update_libraries_watcher
+            )
+
+    watch_interval: FloatProperty(
+            name="Interval",
+            default=2.0,
+            min=0.5,
+            max=60.0,
+            subtype='TIME',
+            unit='TIME',
+            description="Time in seconds between two checks of the libraries",
+            update=_update_libraries_watcher
+            )
+
+    def draw(self, layout):
+        box = self.box_template(layout, self, 'draw_layout', "Libraries")
+        if self.draw_layout:
+            col = box.column()
+            col.use_property_split = True
+            col.prop(self, 'use_index')
+            col.prop(self, 'async_loading')
+            col.prop(self, 'lazy_loading')
+            col.prop(self, 'scan_workers')
+            col.prop(self, 'stat_cache_ttl')
+            if StatCache.remote_roots:
+                col.label(text=f"Network checks avoided: {StatCache.avoided}"
+                               f", folders read: {StatCache.reads}")
+            col.prop(self, 'search_contents')
+            if ContentIndexer.pending:
+                col.label(text=f"Files to read: {ContentIndexer.pending}")
+            col.prop(self, 'watch_libraries')
+            sub = col.column()
+            sub.enabled = self.watch_libraries
+            sub.prop(self, 'watch_polling')
+            sub.prop(self, 'watch_interval')
 
 
 class CyclesPreferences(PropertyGroup, Templates):
@@ -452,6 +626,9 @@ class AssetManagementPreferences(AddonPreferences, Templates):
     interface: PointerProperty(
             type=AssetManagementInterfacePreferences)
 
+    libraries: PointerProperty(
+            type=AssetManagementLibrariesPreferences)
+
     import_export: PointerProperty(
             type=AssetManagementImportExportPreferences)
 
@@ -463,6 +640,7 @@ class AssetManagementPreferences(AddonPreferences, Templates):
         col = layout.column(align=True)
         self.addon_pref.draw(col)
         self.interface.draw(col)
+        self.libraries.draw(col)
         self.import_export.draw(col)
         box = self.box_template(col, self, 'keymaps', "Keymaps")
         if self.keymaps:
@@ -518,6 +696,7 @@ CLASSES = (ASSETM_OT_open_preferences,
            ASSETM_OT_check_for_update,
            AssetManagementAddonPreferences,
            AssetManagementInterfacePreferences,
+           AssetManagementLibrariesPreferences,
            CyclesPreferences,
            AssetManagementImportExportPreferences,
            AssetManagementPreferences)
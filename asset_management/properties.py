@@ -26,6 +26,8 @@ from bpy.types import PropertyGroup
 from bpy.props import (PointerProperty,
                        EnumProperty,
                        BoolProperty,
+                       IntProperty,
+                       FloatProperty,
                        StringProperty,
                        CollectionProperty)
 
@@ -33,6 +35,7 @@ from . import AmIoProps
 from . import AmPreviews
 from .AmLibraries import LibrariesManager as LM
 from .AmCore import AmFilterSearchName
+from .AmFacets import AmFacets
 
 
 def update_projection(self, context):
@@ -226,6 +229,111 @@ def update_search(self, context):
     context.area.tag_redraw()
 
 
+def get_facet(attr, unit=1, type_=int):
+    def get(self):
+        filter = getattr(AmFilterSearchName, LM.active_type.name)
+        return type_(getattr(filter.facets, attr) / unit)
+    return get
+
+
+def set_facet(attr, unit=1):
+    def set(self, value):
+        filter = getattr(AmFilterSearchName, LM.active_type.name)
+        setattr(filter.facets, attr, int(value * unit))
+    return set
+
+
+def get_facets_sort(self):
+    filter = getattr(AmFilterSearchName, LM.active_type.name)
+    return AmFacets.SORT_KEYS.index(filter.facets.sort)
+
+
+def set_facets_sort(self, value):
+    filter = getattr(AmFilterSearchName, LM.active_type.name)
+    filter.facets.sort = AmFacets.SORT_KEYS[value]
+
+
+def get_facets_reverse(self):
+    filter = getattr(AmFilterSearchName, LM.active_type.name)
+    return filter.facets.reverse
+
+
+def set_facets_reverse(self, value):
+    filter = getattr(AmFilterSearchName, LM.active_type.name)
+    filter.facets.reverse = value
+
+
+class AssetManagementFacets(PropertyGroup):
+    """
+    Facets of the active asset type, stored by its filter. 0 disables a
+    criterion.
+    """
+
+    max_size: FloatProperty(
+            name="Max file size",
+            default=0,
+            min=0,
+            description="Maximum size of the asset file in MB",
+            get=get_facet('max_size', 1 << 20, float),
+            set=set_facet('max_size', 1 << 20),
+            update=update_search
+            )
+
+    modified_days: IntProperty(
+            name="Modified in the last days",
+            default=0,
+            min=0,
+            description="Maximum number of days since the asset file has "
+                        "been modified",
+            get=get_facet('modified_within', 86400),
+            set=set_facet('modified_within', 86400),
+            update=update_search
+            )
+
+    max_faces: IntProperty(
+            name="Max faces",
+            default=0,
+            min=0,
+            description="Maximum number of faces, the assets saved without "
+                        "stats are excluded",
+            get=get_facet('max_faces'),
+            set=set_facet('max_faces'),
+            update=update_search
+            )
+
+    max_textures_size: FloatProperty(
+            name="Max textures size",
+            default=0,
+            min=0,
+            description="Maximum size of the textures in MB, the assets "
+                        "saved without stats are excluded",
+            get=get_facet('max_textures_size', 1 << 20, float),
+            set=set_facet('max_textures_size', 1 << 20),
+            update=update_search
+            )
+
+    sort: EnumProperty(
+            name="Sort by",
+            items=(('SCORE', "Relevance", "Best matches of the search first"),
+                   ('NAME', "Name", ""),
+                   ('SIZE', "File size", ""),
+                   ('DATE', "Date modified", ""),
+                   ('FACES', "Faces", ""),
+                   ('TEXTURES', "Textures size", "")),
+            get=get_facets_sort,
+            set=set_facets_sort,
+            update=update_search
+            )
+
+    reverse: BoolProperty(
+            name="Descending",
+            default=False,
+            get=get_facets_reverse,
+            set=set_facets_reverse,
+            update=update_search
+            )
+
+
 class AssetManagementProperties(PropertyGroup):
 
     libraries: EnumProperty(
@@ -256,6 +364,8 @@ class AssetManagementProperties(PropertyGroup):
             update=update_search
             )
 
+    facets: PointerProperty(type=AssetManagementFacets)
+
     io_import: PointerProperty(type=AmIoProps.AmIoImport)
 
     io_export: PointerProperty(type=AmIoProps.AmIoExport)
@@ -282,6 +392,7 @@ class AssetManagementProperties(PropertyGroup):
 CLASSES = [
     AssetTypesItems,
     AssetManagementEnvironment,
+    AssetManagementFacets,
     AssetManagementProperties
     ]
 
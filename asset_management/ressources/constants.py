@@ -36,6 +36,16 @@ THUMBNAILERS_DIR = os.path.join(RESSOURCES_PATH, "thumbnailers")
 
 AM_UI_SETTINGS = os.path.join(AM_DATAS, "ui_settings.json")
 
+AM_LIBRARIES = os.path.join(AM_DATAS, "libraries.json")
+
+AM_LIBRARIES_INDEX = os.path.join(AM_DATAS, "libraries_index.json")
+
+AM_LIBRARIES_UPGRADE = os.path.join(AM_DATAS, "libraries_upgrade.json")
+
+AM_REMOTE_LIBRARIES = os.path.join(AM_DATAS, "remote_libraries.json")
+
+AM_BLEND_CONTENTS = os.path.join(AM_DATAS, "blend_contents.json")
+
 AM_PRESET_PATH = os.path.join(bpy.utils.user_resource('SCRIPTS'), "presets",
                 "asset_management"
                 )
@@ -46,6 +56,12 @@ SUPPORTED_FILES = ('.blend', '.exr', '.hdr')
 
 SUPPORTED_ICONS = ('.jpg', '.jpeg', '.png', '.bip')
 
+# Stats of the assets saved at the root of each category
+CATALOG_FILENAME = ".am_catalog.json"
+
+# Content of a library saved at its root for the read-only clients
+MANIFEST_FILENAME = ".am_manifest.json"
+
 ASSET_TYPE = {'assets': 'MESH_MONKEY',
               'scenes': 'SCENE_DATA',
               'materials': 'MATERIAL_DATA',
@@ -54,6 +70,9 @@ ASSET_TYPE = {'assets': 'MESH_MONKEY',
 
 ORDERED_TYPES = ('assets', 'scenes', 'materials', 'hdri')
 
+# Folders of a category which are not sub categories
+RESERVED_FOLDERS = ('files', 'blends', 'icons', 'favorites')
+
 WARNING_REMOVE_MESSAGE = {'HD': ("The active {} will be removed from "
                                  "your hard drive.",
                                  "All the content will be definitively lost.",
@@ -99,3 +118,5 @@ IBL_THUMBNAILER = os.path.join(_BACKGROUND_STUFF, 'ibl_thumbnailer.py')
 RENAME_MATERIAL = os.path.join(_BACKGROUND_STUFF, 'rename_material.py')
 
 RENAME_ASSET = os.path.join(_BACKGROUND_STUFF, 'rename_asset.py')
+
+CATALOG_BACKFILL = os.path.join(_BACKGROUND_STUFF, 'catalog_backfill.py')
@@ -25,10 +25,10 @@ from bpy.utils import register_class, unregister_class
 from bpy.types import Panel, Operator, Menu, UIList
 
 from .preferences.addon_updater import Updater
-from .AmLibraries import LibrariesManager as LM
+from .AmLibraries import LibrariesManager as LM, LibrariesLoader
 from .AmUtils import addon_prefs
 from .ressources.constants import ASSET_TYPE
-from .AmCore import AmFilterSearchName
+from .AmCore import AmFilterSearchName, AmPages
 
 
 DEBUG = False
@@ -67,6 +67,11 @@ class ASSETM_MT_library_options(Menu):
                             icon='TEXT')
             layout.operator('asset_management.move_library',
                             icon='VIEW_PAN')
+            layout.operator('asset_management.toggle_remote_library',
+                            icon='CHECKBOX_HLT' if LM.active_library.remote
+                            else 'CHECKBOX_DEHLT')
+            layout.operator('asset_management.build_library_manifest',
+                            icon='FILE_CACHE')
             layout.separator()
             layout.operator('asset_management.add_asset_type', icon='ADD')
 
@@ -76,6 +81,8 @@ class ASSETM_MT_library_options(Menu):
                 layout.operator('asset_management.update_asset_type',
                                 text="Refresh asset types",
                                 icon='FILE_REFRESH')
+            layout.operator('asset_management.backfill_catalog',
+                            icon='FILE_BLEND')
 
 
 class ASSETM_MT_category_options(Menu):
@@ -169,7 +176,9 @@ class ASSETM_PT_category_browser(Panel):
                              icon='THREE_DOTS'
                              )
 
-                if subcategory.assets:
+                # No need to load the assets of a category only to know if
+                # the pin can be displayed
+                if not subcategory.is_loaded or subcategory.assets:
                     if LM.active_category == subcategory:
                         row.label(icon='BLANK1')
                     else:
@@ -316,6 +325,26 @@ def draw_preview_template_actions(context, layout, category):
     asset_type = LM.active_type.name
     path = category.path
 
+    if category == LM.active_type:
+        datablock = getattr(AmFilterSearchName, asset_type)
+        assets_count = len(datablock.sorted)
+    else:
+        datablock = category.assets
+        assets_count = len(datablock)
+
+    page, pages = AmPages.get_page(datablock.active_index, assets_count)
+    if pages > 1:
+        row = layout.row(align=True)
+        previous_page = row.operator('asset_management.change_asset',
+                                     text="", icon='TRIA_LEFT_BAR')
+        previous_page.page = -1
+        previous_page.category_path = path
+        row.label(text=f"Page {page}/{pages}")
+        next_page = row.operator('asset_management.change_asset', text="",
+                                 icon='TRIA_RIGHT_BAR')
+        next_page.page = 1
+        next_page.category_path = path
+
     row = layout.row(align=True)
     row.scale_y = 1.2
     left = row.operator('asset_management.change_asset', text="",
@@ -331,11 +360,6 @@ def draw_preview_template_actions(context, layout, category):
     #         category.assets.active.collections:
     #     row.prop(category.preview, 'object_as', text="", expand=True)
     if asset_type == 'assets':
-        if category == LM.active_type:
-            datablock = getattr(AmFilterSearchName, asset_type)
-        else:
-            datablock = category.assets
-
         if datablock.active is not None and datablock.active.collections:
             row.prop(category.preview, 'object_as', text="", expand=True)
 
@@ -393,11 +417,16 @@ def draw_template_pinned_categories(context, layout, pinned_categories):
             row_header.operator('asset_management.clear_filter_search',
                          text="",
                          icon='X')
+            row_header.popover(panel='ASSETM_PT_search_facets',
+                               text="",
+                               icon='FILTER')
+            filter = getattr(AmFilterSearchName, cat.name)
+            row_header.label(icon='TIME' if filter.searching else 'BLANK1')
         else:
             row_header.operator('asset_management.set_active_category',
                          text=cat.name,
                          emboss=cat == LM.active_category).path = cat.path
-        row_header.label(icon='BLANK1')
+            row_header.label(icon='BLANK1')
 
         draw_template_preview(context, col_template, cat)
 
@@ -435,6 +464,13 @@ class ASSETM_PT_asset_management_panel(Panel):
             if DEBUG:
                 layout.operator('asset_management.debug')
 
+            if LibrariesLoader.loading:
+                loaded, total = LibrariesLoader.progress
+                layout.label(text=f"Loading libraries ({loaded}/{total})",
+                             icon='SORTTIME')
+                if LM.active_library is None:
+                    return
+
             if am.edit_asset:
                 row = layout.row()
                 row.alignment = 'CENTER'
@@ -509,14 +545,18 @@ class ASSETM_PT_asset_management_panel(Panel):
 
                         category = LM.active_category
                         pinned_categories = LM.pinned_categories()
-                        if pinned_categories or am.filter_search:
+                        filter = getattr(AmFilterSearchName,
+                                         LM.active_type.name)
+                        filtered = am.filter_search or \
+                            filter.facets.is_active
+                        if pinned_categories or filtered:
                             if hasattr(category, 'assets') and \
                                     category.assets and \
                                     not category.pinned:
                                 category.pinned = True
                                 pinned_categories.insert(0, category)
 
-                            if am.filter_search:
+                            if filtered:
                                 pinned_categories.insert(0, LM.active_type)
 
                             draw_template_pinned_categories(context,
@@ -677,6 +717,28 @@ class ASSETM_PT_options(Panel):
             layout.prop(prefs.import_export, 'load_ui')
 
 
+class ASSETM_PT_search_facets(Panel):
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'WINDOW'
+    bl_label = "Facets"
+
+    def draw(self, context):
+        facets = context.window_manager.asset_management.facets
+
+        layout = self.layout
+        layout.label(text="Filter by:")
+        col = layout.column(align=True)
+        col.prop(facets, 'max_size', text="Max size (MB)")
+        col.prop(facets, 'modified_days', text="Modified in (days)")
+        col.prop(facets, 'max_faces')
+        col.prop(facets, 'max_textures_size', text="Max textures (MB)")
+
+        layout.label(text="Sort by:")
+        row = layout.row(align=True)
+        row.prop(facets, 'sort', text="")
+        row.prop(facets, 'reverse', text="", icon='SORT_DESC')
+
+
 class ASSETM_MT_edit_asset(Menu):
     """Edit asset menu"""
     bl_label = "Edit"
@@ -742,6 +804,7 @@ class ASSETM_UL_export_collections(UIList):
 CLASSES = (ASSETM_UL_export_materials,
            ASSETM_PT_asset_management_panel,
            ASSETM_PT_options,
+           ASSETM_PT_search_facets,
            ASSETM_PT_category_browser,
            ASSETM_PT_environment_panel,
            ASSETM_MT_edit_asset,